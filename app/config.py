@@ -27,6 +27,8 @@ class Settings(BaseSettings):
     database_echo: bool = Field(False, env="DATABASE_ECHO")
     database_pool_size: int = Field(5, env="DATABASE_POOL_SIZE")
     database_max_overflow: int = Field(10, env="DATABASE_MAX_OVERFLOW")
+    database_statement_cache_size: int = Field(1024, env="DATABASE_STATEMENT_CACHE_SIZE")
+    database_prepared_statement_cache_size: int = Field(512, env="DATABASE_PREPARED_STATEMENT_CACHE_SIZE")
     
     # Redis Configuration
     redis_url: str = Field("redis://localhost:6379/0", env="REDIS_URL")
@@ -39,6 +41,7 @@ class Settings(BaseSettings):
     rabbitmq_queue_tracking: str = Field("ros2_tracking", env="RABBITMQ_QUEUE_TRACKING")
     rabbitmq_queue_faces: str = Field("ros2_faces", env="RABBITMQ_QUEUE_FACES")
     rabbitmq_exchange: str = Field("ros2_exchange", env="RABBITMQ_EXCHANGE")
+    rabbitmq_prefetch_count: int = Field(64, env="RABBITMQ_PREFETCH_COUNT")
     
     # Logging Configuration
     log_level: str = Field("INFO", env="LOG_LEVEL")
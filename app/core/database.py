@@ -1,9 +1,10 @@
-from typing import AsyncGenerator
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
 import structlog
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection, create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.pool import NullPool
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, text
 
 from app.config import settings
 
@@ -39,15 +40,26 @@ class DatabaseManager:
         
         logger.info("Initializing database connection", url=settings.database_url)
         
-        # Create async engine  # ⚡ Async engine KHÔNG dùng pool_size/max_overflow
+        # NullPool (development) không nhận pool_size/max_overflow, chỉ truyền khi dùng pool thật
+        pool_kwargs = {} if settings.is_development else {
+            "pool_size": settings.database_pool_size,
+            "max_overflow": settings.database_max_overflow,
+        }
+        
+        # Create async engine
         self.engine = create_async_engine(
             settings.database_url,
             echo=settings.database_echo,
-            # pool_size=settings.database_pool_size,
-            # max_overflow=settings.database_max_overflow,
             poolclass=NullPool if settings.is_development else None,
             future=True,
             pool_pre_ping=True,   # tránh connection chết
+            # Cache prepared statements per connection: the worker aggregates are
+            # the same SQL on every run, only the bind parameters change
+            connect_args={
+                "statement_cache_size": settings.database_statement_cache_size,
+                "prepared_statement_cache_size": settings.database_prepared_statement_cache_size,
+            },
+            **pool_kwargs,
         )
         
         
@@ -106,6 +118,46 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+@asynccontextmanager
+async def get_db_context() -> AsyncIterator[AsyncSession]:
+    """Session for workers: one unit of work, rolled back on error and returned to the pool on exit."""
+    if not db_manager._initialized:
+        db_manager.initialize()
+    
+    async with db_manager.session_factory() as session:
+        try:
+            yield session
+        except Exception as e:
+            await session.rollback()
+            logger.error("Database session error", error=str(e))
+            raise
+
+
+def get_db_connection() -> AsyncConnection:
+    """Get a Core connection for read-only queries that do not need the ORM session."""
+    if not db_manager._initialized:
+        db_manager.initialize()
+    return db_manager.engine.connect()
+
+
+async def is_hypertable(db, table_name: str) -> bool:
+    """Check whether a table is a TimescaleDB hypertable; works on a session or a connection."""
+    # timescaledb_information only exists once the extension is installed
+    has_timescale = await db.scalar(
+        text("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+    )
+    if not has_timescale:
+        return False
+    
+    return bool(await db.scalar(
+        text(
+            "SELECT 1 FROM timescaledb_information.hypertables "
+            "WHERE hypertable_name = :table_name"
+        ),
+        {"table_name": table_name}
+    ))
+
+
 # Database event handlers
 async def init_database():
     """Initialize database on application startup."""
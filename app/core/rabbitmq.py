@@ -1,7 +1,7 @@
 import asyncio
-import json
 from datetime import datetime
 from typing import Dict, Any, Callable, Optional
+import orjson
 import structlog
 import aio_pika
 from aio_pika import Message, ExchangeType
@@ -37,7 +37,7 @@ class RabbitMQManager:
             )
             
             self.channel = await self.connection.channel()
-            await self.channel.set_qos(prefetch_count=10)
+            await self.channel.set_qos(prefetch_count=settings.rabbitmq_prefetch_count)
             
             # Declare exchange
             self.exchange = await self.channel.declare_exchange(
@@ -118,11 +118,12 @@ class RabbitMQManager:
                 return False
         
         try:
-            message_body = json.dumps(message, default=str)
+            # orjson encodes datetimes natively and returns bytes, no separate encode()
+            message_body = orjson.dumps(message, default=str)
             
             await self.exchange.publish(
                 Message(
-                    message_body.encode(),
+                    message_body,
                     content_type="application/json",
                     timestamp=datetime.utcnow(),
                     delivery_mode=2,  # Persistent message
@@ -155,14 +156,14 @@ class RabbitMQManager:
                 async with message.process():
                     try:
                         # Parse message body
-                        message_data = json.loads(message.body.decode())
+                        message_data = orjson.loads(message.body)
                         
                         logger.debug("Message received", queue=queue_name, message_size=len(message.body))
                         
                         # Call the callback function
                         await callback(message_data)
                         
-                    except json.JSONDecodeError as e:
+                    except orjson.JSONDecodeError as e:
                         logger.error("Failed to parse message JSON", queue=queue_name, error=str(e))
                     except Exception as e:
                         logger.error("Error processing message", queue=queue_name, error=str(e))
@@ -12,6 +12,7 @@ import uvicorn
 from app.config import settings
 from app.core.database import init_database, close_database
 from app.core.rabbitmq import init_rabbitmq, close_rabbitmq
+from app.services.rabbitmq_manager import rabbitmq_manager as shared_rabbitmq_connection
 from app.api.v1 import cameras, detections, tracking, analytics, websocket, stream
 from app.workers import start_background_consumers, stop_background_consumers, get_worker_status
 from app.services.camera_service import CameraService
@@ -72,6 +73,7 @@ async def lifespan(app: FastAPI):
         
         # Close RabbitMQ connections
         await close_rabbitmq()
+        await shared_rabbitmq_connection.close_connection()
         logger.info("RabbitMQ connections closed")
         
         # Close database connections
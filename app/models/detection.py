@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Dict, Any, List, Optional
-from sqlalchemy import Column, BigInteger, String, DateTime, JSON, Text, Float, ForeignKey, Index
-from sqlalchemy.sql import func
+from sqlalchemy import Column, BigInteger, Boolean, String, DateTime, JSON, Text, Float, ForeignKey, Index
+from sqlalchemy.sql import func, false, text
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -20,7 +20,9 @@ class Detection(Base):
     
     # Detection metadata
     timestamp = Column(DateTime(timezone=True), nullable=False, index=True)
-    frame_id = Column(String(100), nullable=True)  # Optional frame identifier
+    # Optional frame identifier; "" rather than NULL when the source sends none,
+    # since NULLs are distinct in the unique dedup index below
+    frame_id = Column(String(100), default="", server_default="", nullable=False)
     
     # Detection results
     objects = Column(JSON, nullable=False)  # Array of detected objects with details
@@ -34,6 +36,7 @@ class Detection(Base):
     # Processing metadata
     processed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     processing_time_ms = Column(Float, nullable=True)  # Processing time in milliseconds
+    aggregated = Column(Boolean, default=False, server_default=false(), nullable=False)  # Counted by the data processor
     
     # Relationships
     camera = relationship("Camera", back_populates="detections")
@@ -43,6 +46,10 @@ class Detection(Base):
         Index("idx_detections_camera_timestamp", "camera_id", "timestamp"),
         Index("idx_detections_timestamp_desc", "timestamp", postgresql_using="btree"),
         Index("idx_detections_object_count", "object_count"),
+        # Only rows still waiting for aggregation, so it stays small
+        Index("idx_detections_pending", "processed_at", postgresql_where=text("aggregated = false")),
+        # One row per camera frame, so redelivered messages insert nothing (ON CONFLICT DO NOTHING)
+        Index("idx_detections_dedup", "camera_id", "timestamp", "frame_id", unique=True),
     )
     
     def __repr__(self) -> str:
@@ -77,6 +84,8 @@ class Detection(Base):
         # Parse the detection string
         objects = []
         confidences = []
+        # Every object shares the message timestamp, so format it once
+        timestamp_iso = timestamp.isoformat() if timestamp else None
         
         # Extract objects and confidence scores
         if raw_data and "]" in raw_data:
@@ -93,7 +102,7 @@ class Detection(Base):
                         objects.append({
                             "type": object_type.strip(),
                             "confidence": confidence,
-                            "timestamp": timestamp.isoformat() if timestamp else None
+                            "timestamp": timestamp_iso
                         })
                         confidences.append(confidence)
                     except ValueError:
@@ -215,7 +224,7 @@ class DetectionSummary(Base):
     
     # Indexes
     __table_args__ = (
-        Index("idx_summary_camera_period", "camera_id", "period_start", "period_type"),
+        Index("idx_summary_camera_period", "camera_id", "period_start", "period_type", unique=True),
         Index("idx_summary_period_start", "period_start"),
     )
     
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from sqlalchemy import Column, BigInteger, String, DateTime, JSON, Float, ForeignKey, Index, Integer
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -42,6 +42,8 @@ class Tracking(Base):
     velocity = Column(JSON, nullable=True)     # {"vx": 5.2, "vy": -1.8} pixels per frame
     direction = Column(Float, nullable=True)   # Direction in degrees (0-360)
     distance_traveled = Column(Float, nullable=True)  # Total distance traveled in pixels
+    max_velocity = Column(Float, nullable=True)  # Highest speed between consecutive points so far
+    confidence_sum = Column(Float, nullable=True)  # Sum of confidences so far (avg = sum / frames_tracked)
     
     # Additional tracking data
     attributes = Column(JSON, nullable=True)   # Additional object attributes
@@ -54,8 +56,15 @@ class Tracking(Base):
     
     # Indexes for better performance
     __table_args__ = (
-        Index("idx_tracking_camera_track", "camera_id", "track_id"),
-        Index("idx_tracking_camera_timestamp", "camera_id", "timestamp"),
+        Index("idx_tracking_camera_track_timestamp", "camera_id", "track_id", "timestamp"),
+        Index(
+            "idx_tracking_camera_timestamp_covering", "camera_id", "timestamp",
+            postgresql_include=["track_id", "confidence"]
+        ),
+        Index(
+            "idx_tracking_person_camera_timestamp", "camera_id", "timestamp",
+            postgresql_where=text("object_type = 'person'")
+        ),
         Index("idx_tracking_object_type", "object_type"),
         Index("idx_tracking_status", "track_status"),
     )
@@ -83,6 +92,8 @@ class Tracking(Base):
             "velocity": self.velocity,
             "direction": self.direction,
             "distance_traveled": self.distance_traveled,
+            "max_velocity": self.max_velocity,
+            "confidence_sum": self.confidence_sum,
             "attributes": self.attributes,
             "processed_at": self.processed_at.isoformat() if self.processed_at else None,
         }
@@ -180,9 +191,10 @@ class Tracking(Base):
         
         # Calculate distance moved
         import math
-        dx = self.center_x - prev_track.center_x
-        dy = self.center_y - prev_track.center_y
-        distance = math.sqrt(dx*dx + dy*dy)
+        distance = math.hypot(
+            self.center_x - prev_track.center_x,
+            self.center_y - prev_track.center_y
+        )
         
         # Add to total distance
         prev_distance = prev_track.distance_traveled or 0
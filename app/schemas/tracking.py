@@ -3,13 +3,17 @@ Tracking-related schemas
 """
 
 from datetime import datetime
-from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field
+from typing import Annotated, Optional, List, Dict, Any
+from pydantic import BaseModel, BeforeValidator, Field
+
+# cameras.camera_id is a string column; clients may still send numeric ids
+CameraId = Annotated[str, BeforeValidator(lambda value: str(value) if isinstance(value, int) else value)]
 
 class TrackingCreate(BaseModel):
     """Schema for creating a tracking record"""
-    camera_id: int
-    track_id: str = Field(..., min_length=1, max_length=100)
+    camera_id: CameraId
+    # Stored as BigInteger; numeric strings such as "7" are accepted
+    track_id: int = Field(..., ge=0, le=2**63 - 1)
     object_class: str = Field(..., min_length=1, max_length=50)
     bbox_x: float = Field(..., ge=0.0, le=1.0)
     bbox_y: float = Field(..., ge=0.0, le=1.0)
@@ -64,8 +68,8 @@ class TrackingSummaryResponse(BaseModel):
 
 class TrackingFilter(BaseModel):
     """Schema for filtering tracking data"""
-    camera_id: Optional[int] = None
-    track_ids: Optional[List[str]] = None
+    camera_id: Optional[CameraId] = None
+    track_ids: Optional[List[int]] = None
     object_classes: Optional[List[str]] = None
     min_confidence: Optional[float] = Field(None, ge=0.0, le=1.0)
     min_duration: Optional[int] = None  # minimum tracking duration in seconds
@@ -76,7 +80,7 @@ class TrackingPath(BaseModel):
     """Schema for tracking path visualization"""
     track_id: str
     object_class: str
-    camera_id: int
+    camera_id: CameraId
     path_points: List[Dict[str, Any]]  # [{x, y, timestamp, confidence}, ...]
     start_time: datetime
     end_time: datetime
@@ -96,7 +100,7 @@ class TrackingStats(BaseModel):
 class ActiveTrack(BaseModel):
     """Schema for active tracking objects"""
     track_id: str
-    camera_id: int
+    camera_id: CameraId
     object_class: str
     current_bbox: Dict[str, float]
     confidence: float
@@ -108,7 +112,7 @@ class ActiveTrack(BaseModel):
 class TrackingAlert(BaseModel):
     """Schema for tracking alerts (loitering, intrusion, etc.)"""
     track_id: str
-    camera_id: int
+    camera_id: CameraId
     alert_type: str  # "loitering", "intrusion", "speeding", etc.
     object_class: str
     duration: Optional[float] = None
@@ -120,7 +124,7 @@ class TrackingAlert(BaseModel):
 
 class TrackingHeatmap(BaseModel):
     """Schema for movement heatmap data"""
-    camera_id: int
+    camera_id: CameraId
     object_class: Optional[str] = None
     time_range: Dict[str, datetime]
     heatmap_data: List[List[int]]
@@ -6,6 +6,7 @@ from datetime import datetime, timedelta, date
 from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc, and_, extract, case
+from sqlalchemy.dialects.postgresql import insert
 
 from ..models.camera import Camera
 from ..models.detection import Detection, DetectionSummary
@@ -647,4 +648,47 @@ class AnalyticsService:
             ),
             "cameras_analyzed": camera_ids or "all",
             "generated_at": datetime.utcnow()
-        }
\ No newline at end of file
+        }
+    
+    async def bulk_upsert_hourly_stats(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert or update hourly detection summaries for many cameras in one statement"""
+        await self._bulk_upsert_summaries(rows)
+    
+    async def bulk_upsert_daily_summaries(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert or update daily detection summaries for many cameras in one statement"""
+        await self._bulk_upsert_summaries(rows)
+    
+    async def _bulk_upsert_summaries(self, rows: List[Dict[str, Any]]) -> None:
+        """Upsert DetectionSummary rows keyed by (camera_id, period_start, period_type)"""
+        if not rows:
+            return
+        
+        conflict_columns = ['camera_id', 'period_start', 'period_type']
+        stmt = insert(DetectionSummary).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=conflict_columns,
+            set_={
+                column: stmt.excluded[column]
+                for column in rows[0]
+                if column not in conflict_columns
+            }
+        )
+        
+        await self.db.execute(stmt)
+        await self.db.commit()
+    
+    async def bulk_upsert_detection_stats(self, rows: List[Dict[str, Any]]) -> None:
+        """Add per-camera object counts to the hourly detection summaries in one statement"""
+        if not rows:
+            return
+        
+        stmt = insert(DetectionSummary).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['camera_id', 'period_start', 'period_type'],
+            set_={
+                'total_objects': DetectionSummary.total_objects + stmt.excluded.total_objects
+            }
+        )
+        
+        await self.db.execute(stmt)
+        await self.db.commit()
@@ -6,7 +6,8 @@ from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, desc, and_, extract
+from sqlalchemy import func, desc, and_, extract, select, text
+from sqlalchemy.dialects.postgresql import insert
 
 from ..models.detection import Detection, DetectionSummary
 from ..models.camera import Camera
@@ -16,62 +17,118 @@ from ..schemas.detection import (
     BulkDetectionCreate
 )
 
+# Objects of the stored frame followed by the incoming objects it does not hold
+# yet, so a redelivered object is not appended twice
+_MERGED_OBJECTS = (
+    "(SELECT jsonb_agg(obj ORDER BY src, pos) FROM ("
+    "SELECT 0 AS src, obj, pos "
+    "FROM jsonb_array_elements(detections.objects::jsonb) WITH ORDINALITY AS cur(obj, pos) "
+    "UNION ALL "
+    "SELECT 1, obj, pos "
+    "FROM jsonb_array_elements(excluded.objects::jsonb) WITH ORDINALITY AS inc(obj, pos) "
+    "WHERE NOT detections.objects::jsonb @> jsonb_build_array(obj)"
+    ") merged)"
+)
+_MERGED_CONFIDENCES = (
+    f"(SELECT {{}}((obj ->> 'confidence')::float) FROM jsonb_array_elements({_MERGED_OBJECTS}) AS m(obj))"
+)
+
 class DetectionService:
     """Service for detection processing operations"""
     
     def __init__(self, db: AsyncSession):
         self.db = db
     
+    @staticmethod
+    def _frame_row(detections: List[DetectionCreate]) -> Dict[str, Any]:
+        """Column values for one camera frame built from its per-object detections"""
+        first = detections[0]
+        timestamp_iso = first.timestamp.isoformat()
+        # Same object layout as Detection.parse_ros2_detection, plus the bbox
+        objects = [
+            {
+                "type": detection_data.class_name,
+                "confidence": detection_data.confidence,
+                "bbox": detection_data.bbox,
+                "timestamp": timestamp_iso
+            }
+            for detection_data in detections
+        ]
+        confidences = [obj["confidence"] for obj in objects]
+        return {
+            "camera_id": str(first.camera_id),
+            "timestamp": first.timestamp,
+            "frame_id": first.frame_id or "",
+            "objects": objects,
+            "object_count": len(objects),
+            "confidence_avg": sum(confidences) / len(confidences),
+            "confidence_max": max(confidences),
+            "raw_data": (first.additional_data or {}).get("raw_data")
+        }
+    
+    @classmethod
+    def _frame_rows(cls, detections: List[DetectionCreate]) -> List[Dict[str, Any]]:
+        """Group per-object detections into one row per (camera, timestamp, frame)"""
+        frames: Dict[Tuple[str, datetime, str], List[DetectionCreate]] = {}
+        for detection_data in detections:
+            key = (str(detection_data.camera_id), detection_data.timestamp, detection_data.frame_id or "")
+            frames.setdefault(key, []).append(detection_data)
+        return [cls._frame_row(frame) for frame in frames.values()]
+    
+    async def _upsert_frames(self, rows: List[Dict[str, Any]]) -> List[Detection]:
+        """
+        Insert frame rows in one statement, appending to frames already stored.
+        
+        A frame that exists gets the incoming objects it does not hold yet, with
+        object_count and confidence_* recomputed. Frames with nothing new (e.g. a
+        redelivered message) are left untouched and not returned.
+        """
+        stmt = insert(Detection)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["camera_id", "timestamp", "frame_id"],
+            set_={
+                "objects": text(f"{_MERGED_OBJECTS}::json"),
+                "object_count": text(f"jsonb_array_length({_MERGED_OBJECTS})"),
+                "confidence_avg": text(_MERGED_CONFIDENCES.format("avg")),
+                "confidence_max": text(_MERGED_CONFIDENCES.format("max"))
+            },
+            where=text("NOT detections.objects::jsonb @> excluded.objects::jsonb")
+        ).returning(Detection).execution_options(populate_existing=True)
+        
+        # One multi-row INSERT ... RETURNING instead of a flush plus a refresh per row
+        result = await self.db.scalars(stmt, rows)
+        detections = result.all()
+        await  self.db.commit()
+        return detections
+    
     async def create_detection(self, detection_data: DetectionCreate) -> Detection:
-        """Create a new detection record"""
-        db_detection = Detection(
-            camera_id=detection_data.camera_id,
-            class_name=detection_data.class_name,
-            confidence=detection_data.confidence,
-            bbox_x=detection_data.bbox.x,
-            bbox_y=detection_data.bbox.y,
-            bbox_width=detection_data.bbox.width,
-            bbox_height=detection_data.bbox.height,
-            timestamp=detection_data.timestamp,
-            frame_id=detection_data.frame_id,
-            additional_data=detection_data.additional_data
-        )
+        """Create a detection, adding the object to its frame's row"""
+        row = self._frame_row([detection_data])
+        detections = await self._upsert_frames([row])
+        if detections:
+            return detections[0]
         
-        self.db.add(db_detection)
-        await  self.db.commit()
-        await  self.db.refresh(db_detection)
-        return db_detection
+        # The frame already holds this object
+        result = await self.db.execute(
+            select(Detection).where(
+                and_(
+                    Detection.camera_id == row["camera_id"],
+                    Detection.timestamp == row["timestamp"],
+                    Detection.frame_id == row["frame_id"]
+                )
+            )
+        )
+        return result.scalars().first()
     
     async def create_bulk_detections(
         self, 
         bulk_data: BulkDetectionCreate
     ) -> List[Detection]:
-        """Create multiple detections efficiently"""
-        detections = []
-        
-        for detection_data in bulk_data.detections:
-            db_detection = Detection(
-                camera_id=detection_data.camera_id,
-                class_name=detection_data.class_name,
-                confidence=detection_data.confidence,
-                bbox_x=detection_data.bbox.x,
-                bbox_y=detection_data.bbox.y,
-                bbox_width=detection_data.bbox.width,
-                bbox_height=detection_data.bbox.height,
-                timestamp=detection_data.timestamp,
-                frame_id=detection_data.frame_id,
-                additional_data=detection_data.additional_data
-            )
-            detections.append(db_detection)
-        
-        self.db.add_all(detections)
-        await  self.db.commit()
-        
-        # Refresh all objects
-        for detection in detections:
-            await  self.db.refresh(detection)
-        
-        return detections
+        """Create multiple detections efficiently, one row per camera frame"""
+        rows = self._frame_rows(bulk_data.detections)
+        if not rows:
+            return []
+        return await self._upsert_frames(rows)
     
     async def get_detection(self, detection_id: int) -> Optional[Detection]:
         """Get detection by ID"""
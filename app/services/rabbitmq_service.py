@@ -1,24 +1,46 @@
 # app/services/rabbitmq_service.py
-import json
+import asyncio
+from typing import List, Optional
 import aio_pika
+import orjson
 from app.services.rabbitmq_manager import rabbitmq_manager
 
+# Channel và exchange được tạo một lần trên connection singleton;
+# robust connection tự khôi phục chúng sau khi reconnect
+_connection: Optional[aio_pika.abc.AbstractRobustConnection] = None
+_exchange: Optional[aio_pika.abc.AbstractExchange] = None
+
+async def _get_exchange() -> aio_pika.abc.AbstractExchange:
+    global _connection, _exchange
+    connection = await rabbitmq_manager.get_connection()
+    # get_connection() returns a new object if the previous one was closed
+    if _exchange is None or connection is not _connection:
+        # Publisher confirms: mỗi publish chỉ trả về khi broker đã nhận message
+        channel = await connection.channel(publisher_confirms=True)
+        _exchange = await channel.declare_exchange(
+            "camera.events", # Tên của exchange, phải khớp 100% với bên ROS ..smart_camera_ws/src/smart_camera_bridge/smart_camera_bridge/rabbitmq_config.py
+            aio_pika.ExchangeType.FANOUT,
+            durable=True
+        )
+        _connection = connection
+    return _exchange
+
+def _camera_event_message(payload: dict) -> aio_pika.Message:
+    return aio_pika.Message(body=orjson.dumps(payload), delivery_mode=aio_pika.DeliveryMode.PERSISTENT)
+
 async def publish_camera_event(payload: dict):
     """
     Publish camera events (created/removed) to RabbitMQ.
     Dùng chung connection singleton.
     """
-    connection = await rabbitmq_manager.get_connection()
-    channel = await connection.channel()
-
-    exchange = await channel.declare_exchange(
-        "camera.events", # Tên của exchange, phải khớp 100% với bên ROS ..smart_camera_ws/src/smart_camera_bridge/smart_camera_bridge/rabbitmq_config.py
-        aio_pika.ExchangeType.FANOUT,
-        durable=True
-    )
+    exchange = await _get_exchange()
+    await exchange.publish(_camera_event_message(payload), routing_key="")  # fanout
 
-    body = json.dumps(payload).encode()
-    await exchange.publish(
-        aio_pika.Message(body=body, delivery_mode=aio_pika.DeliveryMode.PERSISTENT),
-        routing_key=""  # fanout
-    )
+async def publish_camera_events(payloads: List[dict]):
+    """Publish many camera events (e.g. a bulk import) and wait for all confirms together"""
+    exchange = await _get_exchange()
+    # Các publish được gửi liên tiếp trên cùng channel thay vì chờ từng confirm
+    await asyncio.gather(*(
+        exchange.publish(_camera_event_message(payload), routing_key="")
+        for payload in payloads
+    ))
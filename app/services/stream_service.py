@@ -1,9 +1,8 @@
 # app/services/stream_service.py
 import asyncio
-import json
-import base64
 import logging
-from typing import Dict, Optional, AsyncGenerator
+import time
+from typing import Dict, Optional, AsyncGenerator, Tuple
 
 import aio_pika
 from fastapi import Depends
@@ -15,6 +14,17 @@ from app.services.rabbitmq_manager import rabbitmq_manager
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG)  # Bật log debug
 
+# Header multipart MJPEG dựng sẵn, chỉ ghép Content-Length theo từng frame
+_FRAME_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: '
+_HEADER_END = b'\r\n\r\n'
+_FRAME_END = b'\r\n'
+
+# Sau số frame hợp lệ liên tiếp này chỉ kiểm tra SOI, bỏ qua đọc EOI ở cuối frame
+_TRUSTED_FRAMES = 128
+
+# Metadata cũ hơn khoảng này coi như camera đã ngừng gửi camera.info
+_INFO_TTL_SECONDS = 1.0
+
 # Dependency chung cho FastAPI
 async def get_rabbitmq_connection() -> aio_pika.abc.AbstractRobustConnection:
     return await rabbitmq_manager.get_connection()
@@ -28,16 +38,22 @@ async def get_stream_service(
 
 class StreamService:
     """Service quản lý stream camera và metadata"""
+
+    # StreamService được tạo mới mỗi request nên cache metadata và
+    # consumer nền của queue camera.info được chia sẻ ở mức class
+    # Mỗi entry là (time.monotonic() lúc nhận, metadata)
+    _info_cache: Dict[str, Tuple[float, CameraStreamInfo]] = {}
+    _info_consumers: Dict[str, asyncio.Task] = {}
+
     def __init__(self, connection: aio_pika.abc.AbstractRobustConnection):
         self.connection = connection
         self.channel: Optional[aio_pika.abc.AbstractChannel] = None
         self._declared_queues: Dict[str, bool] = {}
 
     async def initialize(self):
-        """Khởi tạo channel chung"""
+        """Khởi tạo channel chung (chỉ dùng để declare, không consume nên không cần QoS)"""
         if not self.channel or self.channel.is_closed:
             self.channel = await self.connection.channel()
-            await self.channel.set_qos(prefetch_count=1)
             logger.debug("StreamService channel initialized")
 
     async def _ensure_queues_declared(self, camera_id: str):
@@ -49,50 +65,88 @@ class StreamService:
             await self.initialize()
 
         info_queue_name = f"camera.info.{camera_id}"
-        await self.channel.declare_queue(info_queue_name, durable=False, auto_delete=True)
-        logger.debug(f"Queue declared: {info_queue_name} (metadata)")
-
         stream_queue_name = f"camera.stream.{camera_id}"
-        await self.channel.declare_queue(
-            stream_queue_name,
-            durable=False,
-            auto_delete=True,
-            arguments={
-                "x-max-length": 5,
-                "x-overflow": "drop-head",
-                "x-message-ttl": 2000
-            }
+        # Declare 2 queue song song, tránh 2 lần round-trip tuần tự
+        await asyncio.gather(
+            self.channel.declare_queue(info_queue_name, durable=False, auto_delete=True),
+            self.channel.declare_queue(
+                stream_queue_name,
+                durable=False,
+                auto_delete=True,
+                arguments={
+                    "x-max-length": 5,
+                    "x-overflow": "drop-head",
+                    "x-message-ttl": 2000
+                }
+            )
         )
+        logger.debug(f"Queue declared: {info_queue_name} (metadata)")
+
+        consumer = self._info_consumers.get(camera_id)
+        if consumer is None or consumer.done():
+            self._info_consumers[camera_id] = asyncio.create_task(
+                self._consume_info(camera_id),
+                name=f"camera_info_{camera_id}"
+            )
+
         self._declared_queues[camera_id] = True
         logger.info(f"Declared queues for camera {camera_id} with max-length=5 and ttl=2000ms")
 
-    async def get_stream_info(self, camera_id: str) -> Optional[CameraStreamInfo]:
-        """Lấy metadata từ queue camera.info"""
-        await self._ensure_queues_declared(camera_id)
+    async def _consume_info(self, camera_id: str):
+        """Consumer nền giữ metadata mới nhất của camera trong bộ nhớ"""
         queue_name = f"camera.info.{camera_id}"
+        # Channel riêng với prefetch 1: queue info chỉ cần message mới nhất
+        channel = await self.connection.channel()
+        try:
+            await channel.set_qos(prefetch_count=1)
+            queue = await channel.get_queue(queue_name)
+            async with queue.iterator() as queue_iter:
+                async for message in queue_iter:
+                    async with message.process():
+                        # Metadata nằm trong AMQP headers, body không còn là JSON.
+                        # Dựng CameraStreamInfo một lần mỗi lần cập nhật, không phải mỗi request
+                        self._info_cache[camera_id] = (
+                            time.monotonic(),
+                            self._build_stream_info(camera_id, message.headers or {})
+                        )
+                        logger.debug(f"[_consume_info] Camera {camera_id} metadata: {message.headers}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Info consumer stopped for camera {camera_id}: {e}")
+        finally:
+            self._info_consumers.pop(camera_id, None)
+            if not channel.is_closed:
+                await channel.close()
+
+    @staticmethod
+    def _build_stream_info(camera_id: str, headers: dict) -> CameraStreamInfo:
+        """Dựng CameraStreamInfo từ headers của message camera.info"""
+        width, height = headers.get('width'), headers.get('height')
+        return CameraStreamInfo(
+            camera_id=camera_id,
+            stream_url=f"/api/v1/cameras/{camera_id}/stream",
+            status=CameraStatus.ACTIVE,
+            fps=headers.get("fps"),
+            resolution=f"{width}x{height}" if width and height else None,
+            codec=headers.get("codec"),
+            bitrate=headers.get("bitrate")
+        )
+
+    async def get_stream_info(self, camera_id: str) -> Optional[CameraStreamInfo]:
+        """Lấy metadata mới nhất từ cache của consumer camera.info"""
         try:
-            message = await self.channel.get(queue_name, timeout=3)
-            if not message:
-                logger.warning(f"No info for camera {camera_id}")
+            await self._ensure_queues_declared(camera_id)
+            cached = self._info_cache.get(camera_id)
+            if cached is None or time.monotonic() - cached[0] > _INFO_TTL_SECONDS:
+                logger.warning(f"No fresh info for camera {camera_id}")
                 return CameraStreamInfo(
                     camera_id=camera_id,
                     stream_url=f"/api/v1/cameras/{camera_id}/stream",
                     status=CameraStatus.INACTIVE,
                     fps=None, resolution=None, codec=None, bitrate=None
                 )
-            async with message.process():
-                payload = json.loads(message.body.decode('utf-8'))
-                logger.debug(f"[get_stream_info] Camera {camera_id} metadata: {payload}")
-                width, height = payload.get('width'), payload.get('height')
-                return CameraStreamInfo(
-                    camera_id=camera_id,
-                    stream_url=f"/api/v1/cameras/{camera_id}/stream",
-                    status=CameraStatus.ACTIVE,
-                    fps=payload.get("fps"),
-                    resolution=f"{width}x{height}" if width and height else None,
-                    codec=payload.get("codec"),
-                    bitrate=payload.get("bitrate")
-                )
+            return cached[1]
         except Exception as e:
             logger.error(f"Error getting stream info for camera {camera_id}: {e}")
             return None
@@ -101,26 +155,40 @@ class StreamService:
         """Generator stream video frames"""
         await self._ensure_queues_declared(camera_id)
         queue_name = f"camera.stream.{camera_id}"
+        valid_frames = 0
+        # Channel riêng cho mỗi stream: QoS/back-pressure không ảnh hưởng camera khác.
+        # self.channel chỉ dùng cho thao tác declare
+        channel = await self.connection.channel()
         try:
-            queue = await self.channel.get_queue(queue_name)
+            await channel.set_qos(prefetch_count=5)
+            queue = await channel.get_queue(queue_name)
             async with queue.iterator() as queue_iter:
                 async for message in queue_iter:
                     async with message.process():
                         try:
-                            payload = json.loads(message.body.decode('utf-8'))
-                            frame_base64 = payload.get('frame')
-                            if not frame_base64:
+                            # Producer gửi JPEG thô trong body (metadata ở headers), không base64/JSON
+                            frame_bytes = message.body
+                            if len(frame_bytes) < 4:
+                                valid_frames = 0
                                 continue
-                            frame_bytes = base64.b64decode(frame_base64)
-                            if not (frame_bytes.startswith(b'\xff\xd8') and frame_bytes.endswith(b'\xff\xd9')):
+                            # Kiểm tra SOI trước (payload lỗi thường hỏng ngay byte đầu), rồi EOI
+                            # khi producer chưa được tin cậy
+                            mv = memoryview(frame_bytes)
+                            if mv[0] != 0xFF or mv[1] != 0xD8 or (
+                                valid_frames < _TRUSTED_FRAMES
+                                and (mv[-2] != 0xFF or mv[-1] != 0xD9)
+                            ):
+                                valid_frames = 0
                                 continue
-                            logger.debug(f"[stream_generator] Camera {camera_id} - got frame {len(frame_bytes)} bytes")
-                            yield (
-                                b'--frame\r\n'
-                                b'Content-Type: image/jpeg\r\n'
-                                b'Content-Length: ' + str(len(frame_bytes)).encode() + b'\r\n\r\n' +
-                                frame_bytes + b'\r\n'
-                            )
+                            valid_frames += 1
+                            logger.debug("[stream_generator] Camera %s - got frame %d bytes", camera_id, len(frame_bytes))
+                            yield b"".join((
+                                _FRAME_HEADER,
+                                b"%d" % len(frame_bytes),
+                                _HEADER_END,
+                                frame_bytes,
+                                _FRAME_END,
+                            ))
                         except Exception as e:
                             logger.warning(f"Skipping invalid frame for {camera_id}: {e}")
         except asyncio.CancelledError:
@@ -130,6 +198,8 @@ class StreamService:
             logger.error(f"Error in stream generator for camera {camera_id}: {e}")
             raise
         finally:
+            if not channel.is_closed:
+                await channel.close()
             logger.info(f"Stream generator stopped for camera {camera_id}")
 
     async def create_streaming_response(self, camera_id: str) -> StreamingResponse:
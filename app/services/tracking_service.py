@@ -3,12 +3,14 @@ Tracking analysis service
 """
 
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, and_, distinct
+from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, desc, and_, distinct, cast, Integer, text, select, delete
 import math
+import numpy as np
 
-from ..models.tracking import Tracking, TrackingSummary
+from ..core.database import is_hypertable
+from ..models.tracking import Tracking
 from ..models.camera import Camera
 from ..schemas.tracking import (
     TrackingCreate, TrackingFilter, TrackingStats,
@@ -16,39 +18,142 @@ from ..schemas.tracking import (
 )
 
 class TrackingService:
-    """Service for tracking analysis operations"""
+    """Async service for tracking analysis operations"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
     async def create_tracking(self, tracking_data: TrackingCreate) -> Tracking:
         """Create a new tracking record"""
+        attributes = dict(tracking_data.additional_data or {})
+        if tracking_data.frame_id is not None:
+            attributes["frame_id"] = tracking_data.frame_id
+        
         db_tracking = Tracking(
             camera_id=tracking_data.camera_id,
             track_id=tracking_data.track_id,
-            object_class=tracking_data.object_class,
-            bbox_x=tracking_data.bbox_x,
-            bbox_y=tracking_data.bbox_y,
-            bbox_width=tracking_data.bbox_width,
-            bbox_height=tracking_data.bbox_height,
+            object_type=tracking_data.object_class,
             confidence=tracking_data.confidence,
             timestamp=tracking_data.timestamp,
-            frame_id=tracking_data.frame_id,
-            velocity_x=tracking_data.velocity_x,
-            velocity_y=tracking_data.velocity_y,
-            additional_data=tracking_data.additional_data
+            first_seen=tracking_data.timestamp,
+            last_seen=tracking_data.timestamp,
+            attributes=attributes or None
+        )
+        # The schema sends a top-left corner plus size; the model keeps both
+        # corners in location and the center point in its own columns
+        db_tracking.update_location(
+            tracking_data.bbox_x,
+            tracking_data.bbox_y,
+            tracking_data.bbox_x + tracking_data.bbox_width,
+            tracking_data.bbox_y + tracking_data.bbox_height
         )
+        if tracking_data.velocity_x is not None and tracking_data.velocity_y is not None:
+            db_tracking.velocity = {"vx": tracking_data.velocity_x, "vy": tracking_data.velocity_y}
+        
+        await self._fold_into_track_aggregate(db_tracking)
         
         self.db.add(db_tracking)
-        self.db.commit()
-        self.db.refresh(db_tracking)
+        await self.db.commit()
+        await self.db.refresh(db_tracking)
         return db_tracking
     
+    async def _get_track_row(self, tracking: Tracking, *conditions, order_by) -> Optional[Tracking]:
+        """Get the first stored row of the same track matching the conditions"""
+        result = await self.db.execute(
+            select(Tracking).where(
+                and_(
+                    Tracking.camera_id == tracking.camera_id,
+                    Tracking.track_id == tracking.track_id,
+                    *conditions
+                )
+            ).order_by(order_by).limit(1)
+        )
+        return result.scalars().first()
+    
+    @staticmethod
+    def _step(start: Tracking, end: Tracking) -> Tuple[float, float]:
+        """Distance between the centers of two rows of a track and the speed over it"""
+        if None in (start.center_x, start.center_y, end.center_x, end.center_y):
+            return 0.0, 0.0
+        distance = math.hypot(end.center_x - start.center_x, end.center_y - start.center_y)
+        seconds = (end.timestamp - start.timestamp).total_seconds()
+        return distance, distance / seconds if seconds > 0 else 0.0
+    
+    @staticmethod
+    def _start_track_aggregate(tracking: Tracking) -> None:
+        """Running aggregate of a track made of this row alone"""
+        tracking.frames_tracked = 1
+        tracking.confidence_sum = tracking.confidence
+        tracking.distance_traveled = 0.0
+        tracking.max_velocity = 0.0
+    
+    async def _fold_into_track_aggregate(self, tracking: Tracking) -> None:
+        """
+        Maintain the running aggregate of the track on its latest row.
+        
+        The row with the highest timestamp carries first_seen, frames_tracked,
+        confidence_sum, distance_traveled and max_velocity for the whole track,
+        so a summary is a single index lookup. A row arriving in order extends
+        the aggregate of the current latest row; a row arriving out of order is
+        spliced into the path and folded into the latest row instead.
+        """
+        latest = await self._get_track_row(tracking, order_by=desc(Tracking.timestamp))
+        if latest is None:
+            self._start_track_aggregate(tracking)
+            return
+        
+        if latest.confidence_sum is None:
+            # Track stored before the running aggregate existed: seed it once
+            stats = await self._get_track_stats(latest.track_id, latest.camera_id)
+            latest.first_seen = stats.first_seen
+            latest.frames_tracked = stats.total_frames
+            latest.confidence_sum = float(stats.avg_confidence) * stats.total_frames
+            latest.distance_traveled = float(stats.path_length)
+            latest.max_velocity = float(stats.max_velocity)
+        
+        if tracking.timestamp >= latest.timestamp:
+            distance, speed = self._step(latest, tracking)
+            tracking.first_seen = latest.first_seen or latest.timestamp
+            tracking.frames_tracked = latest.frames_tracked + 1
+            tracking.confidence_sum = latest.confidence_sum + tracking.confidence
+            tracking.distance_traveled = (latest.distance_traveled or 0.0) + distance
+            tracking.max_velocity = max(latest.max_velocity or 0.0, speed)
+            if tracking.velocity is None:
+                tracking.calculate_velocity(latest)
+            return
+        
+        # Out of order: the new point goes between its stored neighbours
+        previous = await self._get_track_row(
+            tracking, Tracking.timestamp < tracking.timestamp, order_by=desc(Tracking.timestamp)
+        )
+        following = await self._get_track_row(
+            tracking, Tracking.timestamp > tracking.timestamp, order_by=Tracking.timestamp
+        )
+        self._start_track_aggregate(tracking)
+        
+        distance_out, speed_out = self._step(tracking, following)
+        if previous is None:
+            distance_in, speed_in, replaced = 0.0, 0.0, 0.0
+            latest.first_seen = tracking.timestamp
+        else:
+            distance_in, speed_in = self._step(previous, tracking)
+            replaced = self._step(previous, following)[0]
+            if tracking.velocity is None:
+                tracking.calculate_velocity(previous)
+        
+        latest.frames_tracked += 1
+        latest.confidence_sum += tracking.confidence
+        latest.distance_traveled = (latest.distance_traveled or 0.0) + distance_in + distance_out - replaced
+        # The replaced segment is never faster than both segments that replace
+        # it, so the running maximum stays exact
+        latest.max_velocity = max(latest.max_velocity or 0.0, speed_in, speed_out)
+    
     async def get_tracking(self, tracking_id: int) -> Optional[Tracking]:
         """Get tracking by ID"""
-        return self.db.query(Tracking).filter(
-            Tracking.id == tracking_id
-        ).first()
+        result = await self.db.execute(
+            select(Tracking).where(Tracking.id == tracking_id)
+        )
+        return result.scalars().first()
     
     async def get_trackings(
         self,
@@ -57,27 +162,29 @@ class TrackingService:
         limit: int = 100
     ) -> List[Tracking]:
         """Get tracking records with filters"""
-        query = self.db.query(Tracking)
+        stmt = select(Tracking)
         
         if filters.camera_id:
-            query = query.filter(Tracking.camera_id == filters.camera_id)
+            stmt = stmt.where(Tracking.camera_id == filters.camera_id)
         
         if filters.track_ids:
-            query = query.filter(Tracking.track_id.in_(filters.track_ids))
+            stmt = stmt.where(Tracking.track_id.in_(filters.track_ids))
         
         if filters.object_classes:
-            query = query.filter(Tracking.object_class.in_(filters.object_classes))
+            stmt = stmt.where(Tracking.object_type.in_(filters.object_classes))
         
         if filters.min_confidence:
-            query = query.filter(Tracking.confidence >= filters.min_confidence)
+            stmt = stmt.where(Tracking.confidence >= filters.min_confidence)
         
         if filters.start_time:
-            query = query.filter(Tracking.timestamp >= filters.start_time)
+            stmt = stmt.where(Tracking.timestamp >= filters.start_time)
         
         if filters.end_time:
-            query = query.filter(Tracking.timestamp <= filters.end_time)
+            stmt = stmt.where(Tracking.timestamp <= filters.end_time)
         
-        return query.order_by(desc(Tracking.timestamp)).offset(skip).limit(limit).all()
+        stmt = stmt.order_by(desc(Tracking.timestamp)).offset(skip).limit(limit)
+        result = await self.db.execute(stmt)
+        return result.scalars().all()
     
     async def get_tracking_path(
         self,
@@ -87,59 +194,60 @@ class TrackingService:
         end_time: Optional[datetime] = None
     ) -> Optional[TrackingPath]:
         """Get complete tracking path for a track"""
-        query = self.db.query(Tracking).filter(
+        stmt = select(
+            Tracking.center_x,
+            Tracking.center_y,
+            Tracking.timestamp,
+            Tracking.confidence,
+            Tracking.object_type
+        ).where(
             and_(
-                Tracking.track_id == track_id,
-                Tracking.camera_id == camera_id
+                Tracking.track_id == int(track_id),
+                Tracking.camera_id == str(camera_id),
+                Tracking.center_x.isnot(None),
+                Tracking.center_y.isnot(None)
             )
         )
         
         if start_time:
-            query = query.filter(Tracking.timestamp >= start_time)
+            stmt = stmt.where(Tracking.timestamp >= start_time)
         if end_time:
-            query = query.filter(Tracking.timestamp <= end_time)
+            stmt = stmt.where(Tracking.timestamp <= end_time)
         
-        trackings = query.order_by(Tracking.timestamp).all()
+        result = await self.db.execute(stmt.order_by(Tracking.timestamp))
+        rows = result.all()
         
-        if not trackings:
+        if not rows:
             return None
         
-        # Build path points
-        path_points = []
-        total_distance = 0.0
-        prev_x, prev_y = None, None
+        # Polyline length over the stored centers in one vectorized pass
+        centers = np.asarray([row[:2] for row in rows], dtype=np.float64)
+        center_x, center_y = centers[:, 0], centers[:, 1]
+        total_distance = float(np.hypot(np.diff(center_x), np.diff(center_y)).sum())
         
-        for tracking in trackings:
-            center_x = tracking.bbox_x + tracking.bbox_width / 2
-            center_y = tracking.bbox_y + tracking.bbox_height / 2
-            
-            path_points.append({
-                "x": center_x,
-                "y": center_y,
-                "timestamp": tracking.timestamp,
-                "confidence": tracking.confidence
-            })
-            
-            # Calculate distance
-            if prev_x is not None and prev_y is not None:
-                distance = math.sqrt(
-                    (center_x - prev_x) ** 2 + (center_y - prev_y) ** 2
-                )
-                total_distance += distance
-            
-            prev_x, prev_y = center_x, center_y
+        # Build path points
+        path_points = [
+            {
+                "x": x,
+                "y": y,
+                "timestamp": row.timestamp,
+                "confidence": row.confidence
+            }
+            for x, y, row in zip(center_x.tolist(), center_y.tolist(), rows)
+        ]
         
         # Calculate average velocity
-        time_duration = (trackings[-1].timestamp - trackings[0].timestamp).total_seconds()
+        first_seen, last_seen = rows[0].timestamp, rows[-1].timestamp
+        time_duration = (last_seen - first_seen).total_seconds()
         avg_velocity = total_distance / time_duration if time_duration > 0 else 0.0
         
         return TrackingPath(
             track_id=track_id,
-            object_class=trackings[0].object_class,
+            object_class=rows[0].object_type,
             camera_id=camera_id,
             path_points=path_points,
-            start_time=trackings[0].timestamp,
-            end_time=trackings[-1].timestamp,
+            start_time=first_seen,
+            end_time=last_seen,
             total_distance=total_distance,
             avg_velocity=avg_velocity
         )
@@ -152,55 +260,83 @@ class TrackingService:
         """Get currently active tracks"""
         cutoff_time = datetime.utcnow() - timedelta(minutes=minutes)
         
-        query = self.db.query(
+        aggregates = select(
             Tracking.track_id,
             Tracking.camera_id,
-            Tracking.object_class,
+            Tracking.object_type,
             func.min(Tracking.timestamp).label('first_seen'),
             func.max(Tracking.timestamp).label('last_seen'),
             func.count(Tracking.id).label('frame_count'),
             func.avg(Tracking.confidence).label('avg_confidence')
-        ).filter(
+        ).where(
             Tracking.timestamp >= cutoff_time
         ).group_by(
-            Tracking.track_id, 
-            Tracking.camera_id, 
-            Tracking.object_class
+            Tracking.track_id,
+            Tracking.camera_id,
+            Tracking.object_type
         )
         
-        if camera_id:
-            query = query.filter(Tracking.camera_id == camera_id)
+        # Latest row per track in the same window (Postgres DISTINCT ON)
+        latest = select(
+            Tracking.track_id,
+            Tracking.camera_id,
+            Tracking.location,
+            Tracking.velocity
+        ).where(
+            Tracking.timestamp >= cutoff_time
+        ).distinct(
+            Tracking.track_id,
+            Tracking.camera_id
+        ).order_by(
+            Tracking.track_id,
+            Tracking.camera_id,
+            desc(Tracking.timestamp)
+        )
         
-        active_data = query.all()
+        if camera_id:
+            aggregates = aggregates.where(Tracking.camera_id == str(camera_id))
+            latest = latest.where(Tracking.camera_id == str(camera_id))
+        
+        aggregates = aggregates.subquery()
+        latest = latest.subquery()
+        
+        result = await self.db.execute(
+            select(
+                aggregates,
+                latest.c.location,
+                latest.c.velocity
+            ).join(
+                latest,
+                and_(
+                    latest.c.track_id == aggregates.c.track_id,
+                    latest.c.camera_id == aggregates.c.camera_id
+                )
+            )
+        )
+        active_data = result.all()
         
         active_tracks = []
         for data in active_data:
-            # Get latest bbox for this track
-            latest_tracking = self.db.query(Tracking).filter(
-                and_(
-                    Tracking.track_id == data.track_id,
-                    Tracking.camera_id == data.camera_id
-                )
-            ).order_by(desc(Tracking.timestamp)).first()
-            
+            location = data.location or {}
             current_bbox = {
-                "x": latest_tracking.bbox_x,
-                "y": latest_tracking.bbox_y,
-                "width": latest_tracking.bbox_width,
-                "height": latest_tracking.bbox_height
+                "x": location.get("x1", 0.0),
+                "y": location.get("y1", 0.0),
+                "width": location.get("width", 0.0),
+                "height": location.get("height", 0.0)
             }
             
             current_velocity = None
-            if latest_tracking.velocity_x is not None and latest_tracking.velocity_y is not None:
+            velocity = data.velocity or {}
+            if velocity.get("vx") is not None and velocity.get("vy") is not None:
                 current_velocity = {
-                    "x": latest_tracking.velocity_x,
-                    "y": latest_tracking.velocity_y
+                    "x": velocity["vx"],
+                    "y": velocity["vy"]
                 }
             
             active_tracks.append(ActiveTrack(
-                track_id=data.track_id,
+                track_id=str(data.track_id),
                 camera_id=data.camera_id,
-                object_class=data.object_class,
+                object_class=data.object_type,
                 current_bbox=current_bbox,
                 confidence=float(data.avg_confidence),
                 first_seen=data.first_seen,
@@ -218,49 +354,55 @@ class TrackingService:
         end_time: Optional[datetime] = None
     ) -> TrackingStats:
         """Get tracking statistics"""
-        query = self.db.query(Tracking)
+        conditions = []
         
         if camera_id:
-            query = query.filter(Tracking.camera_id == camera_id)
+            conditions.append(Tracking.camera_id == str(camera_id))
         if start_time:
-            query = query.filter(Tracking.timestamp >= start_time)
+            conditions.append(Tracking.timestamp >= start_time)
         if end_time:
-            query = query.filter(Tracking.timestamp <= end_time)
+            conditions.append(Tracking.timestamp <= end_time)
         
         # Total unique tracks
-        total_tracks = query.with_entities(
-            func.count(distinct(Tracking.track_id))
-        ).scalar() or 0
+        result = await self.db.execute(
+            select(func.count(distinct(Tracking.track_id))).where(*conditions)
+        )
+        total_tracks = result.scalar() or 0
         
         # Active tracks (last 5 minutes)
         cutoff_time = datetime.utcnow() - timedelta(minutes=5)
-        active_tracks = query.filter(
-            Tracking.timestamp >= cutoff_time
-        ).with_entities(
-            func.count(distinct(Tracking.track_id))
-        ).scalar() or 0
+        result = await self.db.execute(
+            select(func.count(distinct(Tracking.track_id))).where(
+                *conditions, Tracking.timestamp >= cutoff_time
+            )
+        )
+        active_tracks = result.scalar() or 0
         
         # Tracks by class
-        class_stats = query.with_entities(
-            Tracking.object_class,
-            func.count(distinct(Tracking.track_id))
-        ).group_by(Tracking.object_class).all()
+        result = await self.db.execute(
+            select(
+                Tracking.object_type,
+                func.count(distinct(Tracking.track_id))
+            ).where(*conditions).group_by(Tracking.object_type)
+        )
+        class_stats = result.all()
         
         tracks_by_class = {class_name: count for class_name, count in class_stats}
         
-        # Track duration statistics
-        track_durations = self.db.query(
-            (func.max(Tracking.timestamp) - func.min(Tracking.timestamp)).label('duration')
-        ).filter(
-            Tracking.camera_id == camera_id if camera_id else True
-        ).group_by(Tracking.track_id).all()
+        # Track duration statistics; track ids are only unique per camera
+        result = await self.db.execute(
+            select(
+                (func.max(Tracking.timestamp) - func.min(Tracking.timestamp)).label('duration')
+            ).where(*conditions).group_by(Tracking.camera_id, Tracking.track_id)
+        )
+        track_durations = result.all()
         
         durations_seconds = [
             d.duration.total_seconds() for d in track_durations if d.duration
         ]
         
         avg_track_duration = (
-            sum(durations_seconds) / len(durations_seconds) 
+            sum(durations_seconds) / len(durations_seconds)
             if durations_seconds else 0.0
         )
         longest_track_duration = max(durations_seconds) if durations_seconds else 0.0
@@ -269,13 +411,16 @@ class TrackingService:
         total_distance_traveled = 0.0  # Would need more complex calculation
         
         # Tracks by camera
-        camera_stats = self.db.query(
-            Tracking.camera_id,
-            Camera.name,
-            func.count(distinct(Tracking.track_id))
-        ).join(Camera).group_by(
-            Tracking.camera_id, Camera.name
-        ).all()
+        result = await self.db.execute(
+            select(
+                Tracking.camera_id,
+                Camera.name,
+                func.count(distinct(Tracking.track_id))
+            ).join(Camera).group_by(
+                Tracking.camera_id, Camera.name
+            )
+        )
+        camera_stats = result.all()
         
         tracks_by_camera = [
             {
@@ -305,66 +450,56 @@ class TrackingService:
         """Detect loitering behavior"""
         cutoff_time = datetime.utcnow() - timedelta(hours=1)
         
-        # Get tracks that have been active for minimum duration
-        potential_loiterers = self.db.query(
-            Tracking.track_id,
-            func.min(Tracking.timestamp).label('first_seen'),
-            func.max(Tracking.timestamp).label('last_seen'),
-            Tracking.object_class
-        ).filter(
-            and_(
-                Tracking.camera_id == camera_id,
-                Tracking.timestamp >= cutoff_time
-            )
-        ).group_by(
-            Tracking.track_id, Tracking.object_class
-        ).having(
-            (func.max(Tracking.timestamp) - func.min(Tracking.timestamp)) >= 
-            timedelta(minutes=min_duration_minutes)
-        ).all()
-        
-        alerts = []
-        for track_data in potential_loiterers:
-            # Calculate movement area for this track
-            track_positions = self.db.query(
-                Tracking.bbox_x, Tracking.bbox_y
-            ).filter(
+        # Tracks active for the minimum duration whose center stays within the
+        # area threshold, computed in a single aggregate query
+        movement_area = (
+            (func.max(Tracking.center_x) - func.min(Tracking.center_x)) *
+            (func.max(Tracking.center_y) - func.min(Tracking.center_y))
+        )
+        result = await self.db.execute(
+            select(
+                Tracking.track_id,
+                func.min(Tracking.timestamp).label('first_seen'),
+                func.max(Tracking.timestamp).label('last_seen'),
+                Tracking.object_type,
+                movement_area.label('movement_area')
+            ).where(
                 and_(
-                    Tracking.track_id == track_data.track_id,
-                    Tracking.camera_id == camera_id
+                    Tracking.camera_id == str(camera_id),
+                    Tracking.timestamp >= cutoff_time
+                )
+            ).group_by(
+                Tracking.track_id, Tracking.object_type
+            ).having(
+                and_(
+                    (func.max(Tracking.timestamp) - func.min(Tracking.timestamp)) >=
+                    timedelta(minutes=min_duration_minutes),
+                    func.count(Tracking.id) >= 2,
+                    movement_area <= area_threshold
                 )
-            ).all()
-            
-            if len(track_positions) < 2:
-                continue
-            
-            # Calculate bounding area of movement
-            x_coords = [pos.bbox_x for pos in track_positions]
-            y_coords = [pos.bbox_y for pos in track_positions]
-            
-            movement_area = (
-                (max(x_coords) - min(x_coords)) * 
-                (max(y_coords) - min(y_coords))
             )
+        )
+        loiterers = result.all()
+        
+        alerts = []
+        for track_data in loiterers:
+            duration = (track_data.last_seen - track_data.first_seen).total_seconds() / 60
             
-            if movement_area <= area_threshold:
-                duration = (track_data.last_seen - track_data.first_seen).total_seconds() / 60
-                
-                alerts.append(TrackingAlert(
-                    track_id=track_data.track_id,
-                    camera_id=camera_id,
-                    alert_type="loitering",
-                    object_class=track_data.object_class,
-                    duration=duration,
-                    severity="medium" if duration < 20 else "high",
-                    message=f"Object loitering detected for {duration:.1f} minutes",
-                    metadata={
-                        "movement_area": movement_area,
-                        "first_seen": track_data.first_seen.isoformat(),
-                        "last_seen": track_data.last_seen.isoformat()
-                    },
-                    timestamp=datetime.utcnow()
-                ))
+            alerts.append(TrackingAlert(
+                track_id=str(track_data.track_id),
+                camera_id=camera_id,
+                alert_type="loitering",
+                object_class=track_data.object_type,
+                duration=duration,
+                severity="medium" if duration < 20 else "high",
+                message=f"Object loitering detected for {duration:.1f} minutes",
+                metadata={
+                    "movement_area": float(track_data.movement_area),
+                    "first_seen": track_data.first_seen.isoformat(),
+                    "last_seen": track_data.last_seen.isoformat()
+                },
+                timestamp=datetime.utcnow()
+            ))
         
         return alerts
     
@@ -383,36 +518,44 @@ class TrackingService:
         if not end_time:
             end_time = datetime.utcnow()
         
-        query = self.db.query(Tracking).filter(
+        # Bucket the stored tracking centers into grid cells and count them in the database
+        cell_x = cast(func.floor(Tracking.center_x * width), Integer).label('cell_x')
+        cell_y = cast(func.floor(Tracking.center_y * height), Integer).label('cell_y')
+        
+        stmt = select(
+            cell_x,
+            cell_y,
+            func.count(Tracking.id)
+        ).where(
             and_(
-                Tracking.camera_id == camera_id,
+                Tracking.camera_id == str(camera_id),
                 Tracking.timestamp >= start_time,
-                Tracking.timestamp <= end_time
+                Tracking.timestamp <= end_time,
+                # Rows without a location have no center to place
+                Tracking.center_x.isnot(None),
+                Tracking.center_y.isnot(None)
             )
         )
         
         if object_class:
-            query = query.filter(Tracking.object_class == object_class)
+            stmt = stmt.where(Tracking.object_type == object_class)
         
-        trackings = query.all()
+        result = await self.db.execute(stmt.group_by('cell_x', 'cell_y'))
+        rows = result.all()
         
-        if not trackings:
+        if not rows:
             return None
         
-        # Initialize heatmap
-        heatmap_data = [[0 for _ in range(width)] for _ in range(height)]
+        # Scatter the (cell_x, cell_y, count) triples into the grid
+        cells = np.array(rows, dtype=np.int64)
+        center_x = np.clip(cells[:, 0], 0, width - 1)
+        center_y = np.clip(cells[:, 1], 0, height - 1)
         
-        # Populate heatmap with tracking centers
-        for tracking in trackings:
-            center_x = int((tracking.bbox_x + tracking.bbox_width / 2) * width)
-            center_y = int((tracking.bbox_y + tracking.bbox_height / 2) * height)
-            
-            center_x = max(0, min(width - 1, center_x))
-            center_y = max(0, min(height - 1, center_y))
-            
-            heatmap_data[center_y][center_x] += 1
+        heatmap = np.zeros((height, width), dtype=np.int32)
+        np.add.at(heatmap, (center_y, center_x), cells[:, 2])
         
-        max_intensity = max(max(row) for row in heatmap_data)
+        heatmap_data = heatmap.tolist()
+        max_intensity = int(heatmap.max())
         
         return TrackingHeatmap(
             camera_id=camera_id,
@@ -428,104 +571,119 @@ class TrackingService:
             generated_at=datetime.utcnow()
         )
     
+    async def _get_track_stats(self, track_id: str, camera_id: int):
+        """Aggregate a track's summary statistics in the database"""
+        # Per-step displacement between consecutive stored centers, via LAG() over time
+        center_x = Tracking.center_x
+        center_y = Tracking.center_y
+        steps = select(
+            Tracking.timestamp.label('timestamp'),
+            Tracking.confidence.label('confidence'),
+            (center_x - func.lag(center_x).over(order_by=Tracking.timestamp)).label('dx'),
+            (center_y - func.lag(center_y).over(order_by=Tracking.timestamp)).label('dy'),
+            func.extract(
+                'epoch',
+                Tracking.timestamp - func.lag(Tracking.timestamp).over(order_by=Tracking.timestamp)
+            ).label('dt')
+        ).where(
+            and_(
+                Tracking.track_id == int(track_id),
+                Tracking.camera_id == str(camera_id)
+            )
+        ).subquery()
+        
+        # Path length and max velocity are aggregated in the database
+        distance = func.sqrt(steps.c.dx * steps.c.dx + steps.c.dy * steps.c.dy)
+        result = await self.db.execute(
+            select(
+                func.min(steps.c.timestamp).label('first_seen'),
+                func.max(steps.c.timestamp).label('last_seen'),
+                func.count().label('total_frames'),
+                func.avg(steps.c.confidence).label('avg_confidence'),
+                func.coalesce(func.sum(distance), 0.0).label('path_length'),
+                func.coalesce(func.max(distance / func.nullif(steps.c.dt, 0)), 0.0).label('max_velocity')
+            )
+        )
+        return result.one()
+    
     async def create_tracking_summary(
         self,
         track_id: str,
         camera_id: int
-    ) -> Optional[TrackingSummary]:
-        """Create tracking summary for a completed track"""
-        trackings = self.db.query(Tracking).filter(
-            and_(
-                Tracking.track_id == track_id,
-                Tracking.camera_id == camera_id
-            )
-        ).order_by(Tracking.timestamp).all()
-        
-        if not trackings:
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Summarize a track from the running aggregate on its latest row.
+        
+        TrackingSummary holds per-period rollups, so per-track summaries are
+        read on demand instead of being persisted.
+        """
+        result = await self.db.execute(
+            select(Tracking).where(
+                and_(
+                    Tracking.track_id == int(track_id),
+                    Tracking.camera_id == str(camera_id)
+                )
+            ).order_by(desc(Tracking.timestamp)).limit(1)
+        )
+        latest = result.scalars().first()
+        if latest is None:
             return None
         
-        first_seen = trackings[0].timestamp
-        last_seen = trackings[-1].timestamp
-        total_frames = len(trackings)
-        avg_confidence = sum(t.confidence for t in trackings) / total_frames
-        
-        # Calculate path length
-        path_length = 0.0
-        max_velocity = 0.0
-        
-        for i in range(1, len(trackings)):
-            prev = trackings[i-1]
-            curr = trackings[i]
-            
-            # Distance between centers
-            prev_center_x = prev.bbox_x + prev.bbox_width / 2
-            prev_center_y = prev.bbox_y + prev.bbox_height / 2
-            curr_center_x = curr.bbox_x + curr.bbox_width / 2
-            curr_center_y = curr.bbox_y + curr.bbox_height / 2
-            
-            distance = math.sqrt(
-                (curr_center_x - prev_center_x) ** 2 + 
-                (curr_center_y - prev_center_y) ** 2
-            )
-            path_length += distance
-            
-            # Calculate velocity
-            time_diff = (curr.timestamp - prev.timestamp).total_seconds()
-            if time_diff > 0:
-                velocity = distance / time_diff
-                max_velocity = max(max_velocity, velocity)
-        
-        # Check if summary already exists
-        existing_summary = self.db.query(TrackingSummary).filter(
-            and_(
-                TrackingSummary.track_id == track_id,
-                TrackingSummary.camera_id == camera_id
-            )
-        ).first()
-        
-        if existing_summary:
-            # Update existing
-            existing_summary.last_seen = last_seen
-            existing_summary.total_frames = total_frames
-            existing_summary.avg_confidence = avg_confidence
-            existing_summary.path_length = path_length
-            existing_summary.max_velocity = max_velocity
-            existing_summary.updated_at = datetime.utcnow()
-            
-            self.db.commit()
-            self.db.refresh(existing_summary)
-            return existing_summary
+        if latest.confidence_sum is None:
+            # Track stored before the running aggregate existed
+            stats = await self._get_track_stats(track_id, camera_id)
+            first_seen = stats.first_seen
+            total_frames = stats.total_frames
+            confidence_sum = float(stats.avg_confidence) * stats.total_frames
+            path_length = float(stats.path_length)
+            max_velocity = float(stats.max_velocity)
         else:
-            # Create new summary
-            summary = TrackingSummary(
-                camera_id=camera_id,
-                track_id=track_id,
-                object_class=trackings[0].object_class,
-                first_seen=first_seen,
-                last_seen=last_seen,
-                total_frames=total_frames,
-                avg_confidence=avg_confidence,
-                path_length=path_length,
-                max_velocity=max_velocity,
-                summary_date=first_seen.date()
-            )
-            
-            self.db.add(summary)
-            self.db.commit()
-            self.db.refresh(summary)
-            return summary
+            first_seen = latest.first_seen
+            total_frames = latest.frames_tracked
+            confidence_sum = latest.confidence_sum
+            path_length = latest.distance_traveled or 0.0
+            max_velocity = latest.max_velocity or 0.0
+        
+        return {
+            "track_id": track_id,
+            "camera_id": camera_id,
+            "object_class": latest.object_type,
+            "first_seen": first_seen,
+            "last_seen": latest.timestamp,
+            "total_frames": total_frames,
+            "avg_confidence": confidence_sum / total_frames,
+            "path_length": path_length,
+            "max_velocity": max_velocity
+        }
     
     async def cleanup_old_tracking_data(self, days: int = 7) -> int:
-        """Clean up old tracking records"""
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        
-        deleted_count = self.db.query(Tracking).filter(
-            Tracking.created_at < cutoff_date
-        ).count()
+        """
+        Clean up old tracking records.
+        
+        On a TimescaleDB hypertable whole chunks older than the cutoff are
+        dropped and the number of dropped chunks is returned; otherwise rows
+        are deleted and the number of deleted rows is returned.
+        """
+        # timestamp is timestamptz, so compare against an aware cutoff
+        cutoff_date = datetime.now().astimezone() - timedelta(days=days)
+        
+        if await is_hypertable(self.db, Tracking.__tablename__):
+            result = await self.db.execute(
+                # Both arguments are polymorphic, so asyncpg needs explicit types for the binds
+                text(
+                    "SELECT drop_chunks(CAST(:table_name AS regclass), "
+                    "older_than => CAST(:cutoff AS timestamptz))"
+                ),
+                {"table_name": Tracking.__tablename__, "cutoff": cutoff_date}
+            )
+            dropped_chunks = result.fetchall()
+            await self.db.commit()
+            return len(dropped_chunks)
         
-        self.db.query(Tracking).filter(
-            Tracking.created_at < cutoff_date
-        ).delete()
+        # A bulk delete reports its rowcount, so no separate count() scan is needed
+        result = await self.db.execute(
+            delete(Tracking).where(Tracking.timestamp < cutoff_date)
+        )
         
-        self.db.commit()
-        return deleted_count
\ No newline at end of file
+        await self.db.commit()
+        return result.rowcount
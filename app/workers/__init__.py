@@ -1,12 +1,53 @@
 # app/workers/__init__.py
 import asyncio
 import logging
-from typing import List
+import time
+from typing import Awaitable, Callable, Dict
 
 logger = logging.getLogger(__name__)
 
-# Global worker tasks
-worker_tasks: List[asyncio.Task] = []
+# Global worker tasks, keyed by worker name
+worker_tasks: Dict[str, asyncio.Task] = {}
+
+# Worker name -> coroutine function, filled on first use
+WORKER_FACTORIES: Dict[str, Callable[[], Awaitable[None]]] = {}
+
+# Restart back-off per worker: 1, 2, 4 ... 60 s, reset after a healthy run
+MAX_RESTART_DELAY = 60
+HEALTHY_RUN_SECONDS = 60
+restart_attempts: Dict[str, int] = {}
+worker_started_at: Dict[str, float] = {}
+
+def _get_worker_factories() -> Dict[str, Callable[[], Awaitable[None]]]:
+    """Build the worker dispatch table once"""
+    if not WORKER_FACTORIES:
+        # Import here to avoid circular imports
+        from app.workers.rabbitmq_consumer import run_consumer
+        from app.workers.data_processor import run_data_processor
+        from app.workers.cleanup_worker import run_cleanup_worker
+        
+        WORKER_FACTORIES.update({
+            "rabbitmq_consumer": run_consumer,
+            "data_processor": run_data_processor,
+            "cleanup_worker": run_cleanup_worker
+        })
+    return WORKER_FACTORIES
+
+def install_uvloop():
+    """Use uvloop for asyncio.run() in standalone worker processes when it is installed"""
+    # uvloop comes with uvicorn[standard]; fall back to the default loop without it
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+async def _run_worker(name: str, factory: Callable[[], Awaitable[None]], delay: float = 0):
+    """Run a worker after its restart delay, recording when it started"""
+    if delay:
+        await asyncio.sleep(delay)
+    worker_started_at[name] = time.monotonic()
+    await factory()
 
 async def start_background_consumers():
     """Start all background consumer workers"""
@@ -15,31 +56,9 @@ async def start_background_consumers():
     try:
         logger.info("Starting background consumers...")
         
-        # Import here to avoid circular imports
-        from app.workers.rabbitmq_consumer import run_consumer
-        from app.workers.data_processor import run_data_processor  
-        from app.workers.cleanup_worker import run_cleanup_worker
-        
-        # Start RabbitMQ consumer
-        rabbitmq_task = asyncio.create_task(
-            run_consumer(),
-            name="rabbitmq_consumer"
-        )
-        worker_tasks.append(rabbitmq_task)
-        
-        # Start data processor
-        processor_task = asyncio.create_task(
-            run_data_processor(),
-            name="data_processor"
-        )
-        worker_tasks.append(processor_task)
-        
-        # Start cleanup worker
-        cleanup_task = asyncio.create_task(
-            run_cleanup_worker(),
-            name="cleanup_worker"
-        )
-        worker_tasks.append(cleanup_task)
+        # Start RabbitMQ consumer, data processor and cleanup worker
+        for name, factory in _get_worker_factories().items():
+            worker_tasks[name] = asyncio.create_task(_run_worker(name, factory), name=name)
         
         logger.info(f"Started {len(worker_tasks)} background workers")
         
@@ -55,23 +74,34 @@ async def monitor_workers():
     """Monitor background workers and restart if needed"""
     while True:
         try:
-            # Check if any worker has died
-            for i, task in enumerate(worker_tasks):
-                if task.done():
-                    task_name = task.get_name()
-                    logger.warning(f"Worker {task_name} has stopped")
-                    
-                    # Get the exception if the task failed
-                    try:
-                        await task
-                    except Exception as e:
-                        logger.error(f"Worker {task_name} failed: {e}")
-                    
-                    # Restart the worker
-                    await restart_worker(i, task_name)
+            if not worker_tasks:
+                logger.info("No workers to monitor")
+                break
+            
+            # Block until a worker actually exits instead of polling
+            done, _ = await asyncio.wait(
+                list(worker_tasks.values()), return_when=asyncio.FIRST_COMPLETED
+            )
             
-            # Wait before next check
-            await asyncio.sleep(30)  # Check every 30 seconds
+            for task in done:
+                # Removed or replaced while we were waiting
+                task_name = task.get_name()
+                if worker_tasks.get(task_name) is not task:
+                    continue
+                
+                if task.cancelled():
+                    logger.info(f"Worker {task_name} was cancelled")
+                    continue
+                
+                logger.warning(f"Worker {task_name} has stopped")
+                
+                # Get the exception if the task failed
+                if task.exception():
+                    logger.error(f"Worker {task_name} failed: {task.exception()}")
+                
+                # Restart the worker; the delay runs inside its task so the
+                # other workers are still monitored meanwhile
+                await restart_worker(task_name)
             
         except asyncio.CancelledError:
             logger.info("Worker monitor cancelled")
@@ -80,38 +110,29 @@ async def monitor_workers():
             logger.error(f"Error in worker monitor: {e}")
             await asyncio.sleep(10)
 
-async def restart_worker(index: int, task_name: str):
+async def restart_worker(task_name: str):
     """Restart a specific worker"""
     try:
         logger.info(f"Restarting worker: {task_name}")
         
-        # Import here to avoid circular imports
-        from app.workers.rabbitmq_consumer import run_consumer
-        from app.workers.data_processor import run_data_processor
-        from app.workers.cleanup_worker import run_cleanup_worker
-        
-        if task_name == "rabbitmq_consumer":
-            new_task = asyncio.create_task(
-                run_consumer(),
-                name="rabbitmq_consumer"
-            )
-        elif task_name == "data_processor":
-            new_task = asyncio.create_task(
-                run_data_processor(),
-                name="data_processor"
-            )
-        elif task_name == "cleanup_worker":
-            new_task = asyncio.create_task(
-                run_cleanup_worker(),
-                name="cleanup_worker"
-            )
-        else:
+        factory = _get_worker_factories().get(task_name)
+        if factory is None:
             logger.error(f"Unknown worker type: {task_name}")
             return
         
+        # A worker that stayed up long enough starts over at the shortest delay
+        started_at = worker_started_at.get(task_name)
+        if started_at is not None and time.monotonic() - started_at >= HEALTHY_RUN_SECONDS:
+            restart_attempts[task_name] = 0
+        attempts = restart_attempts.get(task_name, 0)
+        delay = min(2 ** attempts, MAX_RESTART_DELAY)
+        restart_attempts[task_name] = attempts + 1
+        
         # Replace the old task with the new one
-        worker_tasks[index] = new_task
-        logger.info(f"Worker {task_name} restarted successfully")
+        worker_tasks[task_name] = asyncio.create_task(
+            _run_worker(task_name, factory, delay), name=task_name
+        )
+        logger.info(f"Worker {task_name} restarting in {delay} s")
         
     except Exception as e:
         logger.error(f"Failed to restart worker {task_name}: {e}")
@@ -123,41 +144,46 @@ async def stop_background_consumers():
     logger.info("Stopping background consumers...")
     
     # Cancel all tasks
-    for task in worker_tasks:
+    for task in worker_tasks.values():
         if not task.done():
             task.cancel()
     
-    # Wait for tasks to complete
+    # Wait for tasks to complete; unlike wait_for(gather(...)) this does not
+    # wrap the tasks again, and reports which ones are still running
     if worker_tasks:
-        try:
-            await asyncio.wait_for(
-                asyncio.gather(*worker_tasks, return_exceptions=True),
-                timeout=30.0
+        _, pending = await asyncio.wait(list(worker_tasks.values()), timeout=30.0)
+        if pending:
+            logger.warning(
+                "Workers did not stop gracefully within timeout: "
+                f"{', '.join(task.get_name() for task in pending)}"
             )
-        except asyncio.TimeoutError:
-            logger.warning("Some workers did not stop gracefully within timeout")
     
     # Clear tasks
     worker_tasks.clear()
+    restart_attempts.clear()
+    worker_started_at.clear()
     logger.info("Background consumers stopped")
 
 def get_worker_status():
     """Get status of all background workers"""
     status = {
         "total_workers": len(worker_tasks),
-        "running_workers": sum(1 for task in worker_tasks if not task.done()),
-        "failed_workers": sum(1 for task in worker_tasks if task.done() and task.exception()),
+        "running_workers": sum(1 for task in worker_tasks.values() if not task.done()),
+        "failed_workers": sum(
+            1 for task in worker_tasks.values()
+            if task.done() and not task.cancelled() and task.exception()
+        ),
         "workers": []
     }
     
-    for task in worker_tasks:
+    for name, task in worker_tasks.items():
         worker_info = {
-            "name": task.get_name(),
+            "name": name,
             "running": not task.done(),
             "cancelled": task.cancelled() if task.done() else False
         }
         
-        if task.done() and task.exception():
+        if task.done() and not task.cancelled() and task.exception():
             worker_info["error"] = str(task.exception())
         
         status["workers"].append(worker_info)
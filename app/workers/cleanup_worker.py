@@ -0,0 +1,366 @@
+# app/workers/cleanup_worker.py
+import asyncio
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, select, func, and_, exists, text
+
+from app.core.database import get_db_context, get_db_connection, is_hypertable
+from app.models.camera import Camera
+from app.models.detection import Detection, DetectionSummary
+from app.models.tracking import Tracking
+from app.models.face_recognition import FaceRecognition
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# pg advisory lock key shared by every replica running the cleanup worker
+CLEANUP_LOCK_KEY = 74283941
+
+class CleanupWorker:
+    def __init__(self):
+        # Configuration for data retention (in days)
+        self.detection_retention_days = getattr(settings, 'DETECTION_RETENTION_DAYS', 30)
+        self.tracking_retention_days = getattr(settings, 'TRACKING_RETENTION_DAYS', 30)
+        self.face_retention_days = getattr(settings, 'FACE_RETENTION_DAYS', 90)
+        
+        # Cleanup intervals
+        self.cleanup_interval_hours = 6  # Run cleanup every 6 hours
+        self.batch_size = 1000  # Delete orphaned and expired records in batches of this many rows
+        self.delete_slice = timedelta(hours=1)  # Delete expired records one hour at a time
+        
+        # Monitoring stats are catalog estimates; reuse them for a minute
+        self.stats_ttl_seconds = 60
+        self._stats: Dict[str, Any] = {}
+        self._stats_ts = 0.0
+    
+    async def _drop_old_chunks(self, db: AsyncSession, table_name: str, cutoff_date: datetime) -> int:
+        """Drop whole daily chunks older than the cutoff; returns the number of chunks dropped"""
+        result = await db.execute(
+            # Both arguments are polymorphic, so asyncpg needs explicit types for the binds
+            text(
+                "SELECT drop_chunks(CAST(:table_name AS regclass), "
+                "older_than => CAST(:cutoff AS timestamptz))"
+            ),
+            {"table_name": table_name, "cutoff": cutoff_date}
+        )
+        dropped_chunks = len(result.fetchall())
+        await db.commit()
+        return dropped_chunks
+    
+    async def _delete_by_time_slices(
+        self, db: AsyncSession, model, cutoff_date: datetime, label: str
+    ) -> int:
+        """Delete rows older than the cutoff one time slice at a time; returns the number of rows deleted"""
+        # Start from the oldest row (one probe of the timestamp index)
+        window_start = await db.scalar(
+            select(func.min(model.timestamp)).where(model.timestamp < cutoff_date)
+        )
+        deleted_count = 0
+        while window_start is not None:
+            # Each slice is a contiguous timestamp range: index range scans over
+            # adjacent pages. A dense slice is deleted in capped batches so every
+            # transaction stays short
+            window_end = min(window_start + self.delete_slice, cutoff_date)
+            while True:
+                batch_ids = (
+                    select(model.id)
+                    .where(and_(model.timestamp >= window_start, model.timestamp < window_end))
+                    .limit(self.batch_size)
+                )
+                result = await db.execute(
+                    delete(model)
+                    .where(model.id.in_(batch_ids))
+                    .execution_options(synchronize_session=False)
+                )
+                deleted_count += result.rowcount
+                await db.commit()
+                
+                # Yield to the event loop between batches; each batch is already
+                # a short transaction, so no fixed delay is needed
+                await asyncio.sleep(0)
+                if result.rowcount < self.batch_size:
+                    break
+            
+            logger.info(f"Deleted {deleted_count} {label} records so far")
+            
+            # Jump over gaps in the data straight to the next stored row, instead
+            # of stepping through empty slices
+            window_start = await db.scalar(
+                select(func.min(model.timestamp)).where(
+                    and_(model.timestamp >= window_end, model.timestamp < cutoff_date)
+                )
+            )
+        
+        return deleted_count
+    
+    async def cleanup_old_detections(self):
+        """Remove old detection records"""
+        try:
+            cutoff_date = datetime.now().astimezone() - timedelta(days=self.detection_retention_days)
+            logger.info(f"Cleaning up detections older than {cutoff_date}")
+            
+            async with get_db_context() as db:
+                # Partitioned by day: dropping chunks replaces the row deletes
+                if await is_hypertable(db, Detection.__tablename__):
+                    dropped = await self._drop_old_chunks(db, Detection.__tablename__, cutoff_date)
+                    logger.info(f"Cleanup completed: dropped {dropped} detection chunks")
+                    return
+                
+                deleted_count = await self._delete_by_time_slices(
+                    db, Detection, cutoff_date, "detection"
+                )
+                if deleted_count == 0:
+                    logger.info("No old detections to clean up")
+                    return
+                
+                logger.info(f"Cleanup completed: deleted {deleted_count} detection records")
+                
+        except Exception as e:
+            logger.error(f"Error cleaning up detections: {e}")
+    
+    async def cleanup_old_tracking(self):
+        """Remove old tracking records"""
+        try:
+            cutoff_date = datetime.now().astimezone() - timedelta(days=self.tracking_retention_days)
+            logger.info(f"Cleaning up tracking data older than {cutoff_date}")
+            
+            async with get_db_context() as db:
+                if await is_hypertable(db, Tracking.__tablename__):
+                    dropped = await self._drop_old_chunks(db, Tracking.__tablename__, cutoff_date)
+                    logger.info(f"Cleanup completed: dropped {dropped} tracking chunks")
+                    return
+                
+                deleted_count = await self._delete_by_time_slices(
+                    db, Tracking, cutoff_date, "tracking"
+                )
+                if deleted_count == 0:
+                    logger.info("No old tracking data to clean up")
+                    return
+                
+                logger.info(f"Cleanup completed: deleted {deleted_count} tracking records")
+                
+        except Exception as e:
+            logger.error(f"Error cleaning up tracking data: {e}")
+    
+    async def cleanup_old_face_recognitions(self):
+        """Remove old face recognition records"""
+        try:
+            cutoff_date = datetime.now().astimezone() - timedelta(days=self.face_retention_days)
+            logger.info(f"Cleaning up face recognition data older than {cutoff_date}")
+            
+            async with get_db_context() as db:
+                deleted_count = await self._delete_by_time_slices(
+                    db, FaceRecognition, cutoff_date, "face recognition"
+                )
+                if deleted_count == 0:
+                    logger.info("No old face recognition data to clean up")
+                    return
+                
+                logger.info(f"Cleanup completed: deleted {deleted_count} face recognition records")
+                
+        except Exception as e:
+            logger.error(f"Error cleaning up face recognition data: {e}")
+    
+    async def _delete_orphans(self, db: AsyncSession, model) -> Counter:
+        """Delete rows whose camera no longer exists in batches; returns deleted rows per camera_id"""
+        deleted = Counter()
+        while True:
+            # Anti-join on cameras, so no per-camera query or unbounded delete is needed
+            batch_ids = (
+                select(model.id)
+                .where(~exists().where(Camera.camera_id == model.camera_id))
+                .limit(self.batch_size)
+            )
+            result = await db.execute(
+                delete(model)
+                .where(model.id.in_(batch_ids))
+                .returning(model.camera_id)
+                .execution_options(synchronize_session=False)
+            )
+            camera_ids = result.scalars().all()
+            if not camera_ids:
+                break
+            
+            deleted.update(camera_ids)
+            await db.commit()
+        
+        return deleted
+    
+    async def cleanup_orphaned_records(self):
+        """Remove orphaned records that reference non-existent cameras"""
+        try:
+            logger.info("Cleaning up orphaned records")
+            
+            async with get_db_context() as db:
+                for model, label in ((Detection, "detection"), (Tracking, "tracking")):
+                    deleted = await self._delete_orphans(db, model)
+                    for camera_id, count in deleted.items():
+                        logger.warning(f"Deleted {count} orphaned {label} records for camera_id: {camera_id}")
+                
+                logger.info("Orphaned records cleanup completed")
+                
+        except Exception as e:
+            logger.error(f"Error cleaning up orphaned records: {e}")
+    
+    async def _analyze_table(self, table_name: str):
+        """ANALYZE one table on its own autocommit connection"""
+        async with get_db_connection() as conn:
+            # No surrounding transaction, so no snapshot is held while it runs
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text(f'ANALYZE "{table_name}"'))
+    
+    async def optimize_database(self):
+        """Perform database optimization tasks"""
+        try:
+            logger.info("Starting database optimization")
+            
+            # For PostgreSQL, you might want to run VACUUM ANALYZE
+            # Note: This requires special privileges and should be done carefully
+            
+            # Update table statistics; tables are analyzed concurrently on separate connections
+            await asyncio.gather(*(
+                self._analyze_table(model.__tablename__)
+                for model in (Detection, Tracking, FaceRecognition, DetectionSummary)
+            ))
+            
+            logger.info("Database optimization completed")
+                
+        except Exception as e:
+            logger.error(f"Error during database optimization: {e}")
+    
+    async def get_database_stats(self):
+        """Get database statistics for monitoring, cached for stats_ttl_seconds"""
+        if self._stats and time.monotonic() - self._stats_ts < self.stats_ttl_seconds:
+            return self._stats
+        
+        try:
+            async with get_db_connection() as conn:
+                # Planner estimates and sizes from the catalog in one round trip instead
+                # of a count(*) scan per table. Hypertable chunks are children of the
+                # table in pg_inherits, so they are summed into their parent
+                result = await conn.execute(
+                    text("""
+                        SELECT c.relname,
+                               sum(greatest(p.reltuples, 0))::bigint AS row_estimate,
+                               sum(pg_total_relation_size(p.oid))::bigint AS total_bytes
+                        FROM pg_class c
+                        JOIN pg_class p
+                          ON p.oid = c.oid
+                          OR p.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = c.oid)
+                        WHERE c.relname = ANY(:tables) AND c.relkind IN ('r', 'p')
+                        GROUP BY c.relname
+                    """),
+                    {"tables": [
+                        Detection.__tablename__,
+                        Tracking.__tablename__,
+                        FaceRecognition.__tablename__,
+                        DetectionSummary.__tablename__
+                    ]}
+                )
+                rows = result.all()
+            
+            # Approximate record counts in each table
+            row_estimates = {relname: row_estimate for relname, row_estimate, _ in rows}
+            stats = {
+                'detections': row_estimates.get(Detection.__tablename__, 0),
+                'tracking': row_estimates.get(Tracking.__tablename__, 0),
+                'face_recognitions': row_estimates.get(FaceRecognition.__tablename__, 0)
+            }
+            
+            # Disk usage estimates
+            total_size = sum(total_bytes for _, _, total_bytes in rows)
+            stats['total_size_bytes'] = total_size
+            stats['total_size_mb'] = round(total_size / 1024 / 1024, 2) if total_size else 0
+            
+            self._stats, self._stats_ts = stats, time.monotonic()
+            return stats
+                
+        except Exception as e:
+            logger.error(f"Error getting database stats: {e}")
+            return {}
+    
+    async def _run_cleanup_cycle(self):
+        """Run one full cleanup cycle"""
+        logger.info("Starting scheduled cleanup")
+        
+        # Log database stats before cleanup
+        stats_before = await self.get_database_stats()
+        logger.info(f"Database stats before cleanup: {stats_before}")
+        
+        # Run cleanup tasks; the retention deletes touch separate tables
+        # with their own sessions, so they run concurrently
+        await asyncio.gather(
+            self.cleanup_old_detections(),
+            self.cleanup_old_tracking(),
+            self.cleanup_old_face_recognitions(),
+            return_exceptions=True
+        )
+        await self.cleanup_orphaned_records()
+        
+        # Optimize database
+        await self.optimize_database()
+        
+        # Each cleanup step has already logged what it deleted, so the stats
+        # are not queried a second time
+        logger.info("Cleanup cycle completed")
+    
+    async def run_cleanup_worker(self):
+        """Main cleanup worker loop"""
+        logger.info("Starting cleanup worker")
+        
+        # Scheduled on the monotonic clock so NTP/DST jumps neither skip nor repeat a cycle
+        interval = self.cleanup_interval_hours * 3600
+        next_run = time.monotonic() + interval
+        retries = 0
+        
+        while True:
+            try:
+                # Sleep straight until the next cycle instead of waking every hour
+                await asyncio.sleep(max(0, next_run - time.monotonic()))
+                
+                # Every replica runs this loop; only the one holding the lock cleans up
+                async with get_db_connection() as lock_conn:
+                    # Autocommit so the lock connection is not left idle in a transaction
+                    await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+                    locked = await lock_conn.scalar(
+                        text("SELECT pg_try_advisory_lock(:key)"), {"key": CLEANUP_LOCK_KEY}
+                    )
+                    if locked:
+                        try:
+                            await self._run_cleanup_cycle()
+                        finally:
+                            await lock_conn.execute(
+                                text("SELECT pg_advisory_unlock(:key)"), {"key": CLEANUP_LOCK_KEY}
+                            )
+                    else:
+                        logger.info("Cleanup held by another worker, skipping this cycle")
+                
+                next_run += interval
+                retries = 0
+                
+            except Exception as e:
+                logger.error(f"Error in cleanup worker main loop: {e}")
+                # Back off 5, 10, 20, then 30 minutes before retrying the cycle
+                await asyncio.sleep(min(300 * 2 ** retries, 1800))
+                retries += 1
+
+# Cleanup worker instance
+cleanup_worker = CleanupWorker()
+
+async def run_cleanup_worker():
+    """Run the cleanup worker"""
+    try:
+        await cleanup_worker.run_cleanup_worker()
+    except KeyboardInterrupt:
+        logger.info("Cleanup worker interrupted by user")
+    except Exception as e:
+        logger.error(f"Cleanup worker error: {e}")
+
+if __name__ == "__main__":
+    from app.workers import install_uvloop
+    install_uvloop()
+    asyncio.run(run_cleanup_worker())
\ No newline at end of file
@@ -1,12 +1,13 @@
 # app/workers/data_processor.py
 import asyncio
 import logging
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, update, func, and_, false
 
-from app.core.database import get_db_session
+from app.core.database import get_db_context, get_db_connection
 from app.models.detection import Detection
 from app.models.tracking import Tracking
 from app.models.face_recognition import FaceRecognition
@@ -18,265 +19,380 @@ logger = logging.getLogger(__name__)
 
 class DataProcessor:
     def __init__(self):
-        self.analytics_service = AnalyticsService()
         self.processing_interval = 60  # Process every minute
         self.batch_size = 1000
+        
+        # Detections stay pending in the database across runs and are claimed
+        # and upserted in one transaction per batch when a flush is due
+        self.detection_flush_threshold = 1000  # pending detections
+        self.detection_flush_interval = 300  # seconds
+        self._last_detection_flush = time.monotonic()
     
-    async def process_hourly_statistics(self):
+    async def process_hourly_statistics(self, db: AsyncSession):
         """Process and aggregate hourly statistics"""
         try:
-            current_hour = datetime.now().replace(minute=0, second=0, microsecond=0)
+            # Hour buckets are UTC, the same as the detection aggregation
+            current_hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
             previous_hour = current_hour - timedelta(hours=1)
             
             logger.info(f"Processing hourly stats for: {previous_hour}")
             
-            async with get_db_session() as db:
-                # Get all active cameras
-                cameras_result = await db.execute(
-                    select(Camera).where(Camera.status == 'active')
+            camera_ids = await self._get_active_camera_ids()
+            hourly_stats = await self._collect_hourly_stats(previous_hour)
+            
+            rows = []
+            for camera_id in camera_ids:
+                total_detections, unique_tracks, avg_confidence, person_count = (
+                    hourly_stats.get(camera_id, (0, 0, 0.0, 0))
                 )
-                cameras = cameras_result.scalars().all()
-                
-                for camera in cameras:
-                    await self._process_camera_hourly_stats(db, camera.camera_id, previous_hour)
+                rows.append({
+                    'camera_id': camera_id,
+                    'period_start': previous_hour,
+                    'period_end': current_hour,
+                    'period_type': 'hour',
+                    'total_detections': total_detections,
+                    'person_count_total': person_count,
+                    'confidence_avg': float(avg_confidence),
+                    'activity_pattern': {'unique_tracks': unique_tracks}
+                })
             
+            # Update hourly stats for all cameras in one upsert
+            await AnalyticsService(db).bulk_upsert_hourly_stats(rows)
+            
+            logger.info(f"Updated hourly stats for {len(rows)} cameras")
+        
         except Exception as e:
             logger.error(f"Error processing hourly statistics: {e}")
+            # Leave the shared session usable for the rest of the tick
+            await db.rollback()
     
-    async def _process_camera_hourly_stats(self, db: AsyncSession, camera_id: str, hour_timestamp: datetime):
-        """Process hourly statistics for a specific camera"""
-        try:
-            next_hour = hour_timestamp + timedelta(hours=1)
-            
-            # Count detections in the hour
-            detection_count_result = await db.execute(
-                select(func.count(Detection.id))
-                .where(
-                    and_(
-                        Detection.camera_id == camera_id,
-                        Detection.timestamp >= hour_timestamp,
-                        Detection.timestamp < next_hour
-                    )
-                )
+    async def _get_active_camera_ids(self) -> List[str]:
+        """Get camera_id of all active cameras"""
+        async with get_db_connection() as conn:
+            cameras_result = await conn.execute(
+                select(Camera.camera_id).where(Camera.status == 'active')
             )
-            total_detections = detection_count_result.scalar() or 0
-            
-            # Count unique tracks
-            unique_tracks_result = await db.execute(
-                select(func.count(func.distinct(Tracking.track_id)))
-                .where(
-                    and_(
-                        Tracking.camera_id == camera_id,
-                        Tracking.timestamp >= hour_timestamp,
-                        Tracking.timestamp < next_hour
-                    )
+            return cameras_result.scalars().all()
+    
+    async def _fetch_all(self, stmt) -> List[Any]:
+        """Run a read-only query on its own Core connection, so independent queries can run concurrently"""
+        async with get_db_connection() as conn:
+            result = await conn.execute(stmt)
+            return result.all()
+    
+    async def _collect_hourly_stats(self, hour_timestamp: datetime) -> Dict[str, tuple]:
+        """
+        Aggregate one hour of data for all cameras at once.
+        
+        Returns camera_id -> (total_detections, unique_tracks, avg_confidence, person_count)
+        """
+        next_hour = hour_timestamp + timedelta(hours=1)
+        
+        # Detections per camera
+        detection_query = (
+            select(Detection.camera_id, func.count(Detection.id))
+            .where(
+                and_(
+                    Detection.timestamp >= hour_timestamp,
+                    Detection.timestamp < next_hour
                 )
             )
-            unique_tracks = unique_tracks_result.scalar() or 0
-            
-            # Average confidence
-            avg_confidence_result = await db.execute(
-                select(func.avg(Tracking.confidence))
-                .where(
-                    and_(
-                        Tracking.camera_id == camera_id,
-                        Tracking.timestamp >= hour_timestamp,
-                        Tracking.timestamp < next_hour
-                    )
-                )
+            .group_by(Detection.camera_id)
+        )
+        
+        # Tracking aggregates per camera, person count fused into the same scan.
+        # count(DISTINCT track_id) always sorts each group; grouping by
+        # (camera_id, track_id) first lets Postgres hash-aggregate instead, and
+        # the outer query counts tracks and re-combines the partial sums
+        per_track = (
+            select(
+                Tracking.camera_id.label('camera_id'),
+                func.count(Tracking.id).label('rows'),
+                func.sum(Tracking.confidence).label('confidence_sum'),
+                func.count(Tracking.id).filter(Tracking.object_type == 'person').label('persons')
             )
-            avg_confidence = avg_confidence_result.scalar() or 0.0
-            
-            # Count persons (assuming object_type = 'person')
-            person_count_result = await db.execute(
-                select(func.count(Tracking.id))
-                .where(
-                    and_(
-                        Tracking.camera_id == camera_id,
-                        Tracking.object_type == 'person',
-                        Tracking.timestamp >= hour_timestamp,
-                        Tracking.timestamp < next_hour
-                    )
+            .where(
+                and_(
+                    Tracking.timestamp >= hour_timestamp,
+                    Tracking.timestamp < next_hour
                 )
             )
-            person_count = person_count_result.scalar() or 0
-            
-            # Update hourly stats
-            await self.analytics_service.update_hourly_stats(
-                db, camera_id, hour_timestamp,
-                person_count, total_detections, unique_tracks, float(avg_confidence)
+            .group_by(Tracking.camera_id, Tracking.track_id)
+            .subquery()
+        )
+        tracking_query = (
+            select(
+                per_track.c.camera_id,
+                func.count(),
+                func.sum(per_track.c.confidence_sum) / func.sum(per_track.c.rows),
+                func.sum(per_track.c.persons)
             )
-            
-            logger.info(f"Updated hourly stats for camera {camera_id}: "
-                       f"persons={person_count}, detections={total_detections}")
-            
-        except Exception as e:
-            logger.error(f"Error processing hourly stats for camera {camera_id}: {e}")
+            .group_by(per_track.c.camera_id)
+        )
+        
+        # The two tables are scanned concurrently on separate connections
+        detection_rows, tracking_rows = await asyncio.gather(
+            self._fetch_all(detection_query),
+            self._fetch_all(tracking_query)
+        )
+        detection_counts = dict(detection_rows)
+        tracking_stats = {
+            camera_id: (unique_tracks, avg_confidence, person_count)
+            for camera_id, unique_tracks, avg_confidence, person_count in tracking_rows
+        }
+        
+        stats = {}
+        for camera_id in detection_counts.keys() | tracking_stats.keys():
+            unique_tracks, avg_confidence, person_count = tracking_stats.get(camera_id, (0, None, 0))
+            stats[camera_id] = (
+                detection_counts.get(camera_id, 0),
+                unique_tracks or 0,
+                avg_confidence or 0.0,
+                person_count or 0
+            )
+        return stats
     
-    async def process_daily_summaries(self):
+    async def process_daily_summaries(self, db: AsyncSession):
         """Process and aggregate daily summaries"""
         try:
             yesterday = (datetime.now() - timedelta(days=1)).date()
             logger.info(f"Processing daily summary for: {yesterday}")
             
-            async with get_db_session() as db:
-                cameras_result = await db.execute(
-                    select(Camera).where(Camera.status == 'active')
+            camera_ids = await self._get_active_camera_ids()
+            daily_stats = await self._collect_daily_stats(yesterday)
+            start_of_day = datetime.combine(yesterday, datetime.min.time())
+            
+            rows = []
+            for camera_id in camera_ids:
+                total_persons, total_detections, peak_hour = (
+                    daily_stats.get(camera_id, (0, 0, 0))
                 )
-                cameras = cameras_result.scalars().all()
                 
-                for camera in cameras:
-                    await self._process_camera_daily_summary(db, camera.camera_id, yesterday)
-                    
+                # Calculate uptime (simplified - assume 100% if we have any data)
+                uptime_percentage = 100.0 if total_detections > 0 else 0.0
+                
+                rows.append({
+                    'camera_id': camera_id,
+                    'period_start': start_of_day,
+                    'period_end': start_of_day + timedelta(days=1),
+                    'period_type': 'day',
+                    'total_detections': total_detections,
+                    'person_count_total': total_persons,
+                    'peak_hour': peak_hour,
+                    'activity_pattern': {'uptime_percentage': uptime_percentage}
+                })
+            
+            # Update daily summaries for all cameras in one upsert
+            await AnalyticsService(db).bulk_upsert_daily_summaries(rows)
+            
+            logger.info(f"Updated daily summary for {len(rows)} cameras")
+                
         except Exception as e:
             logger.error(f"Error processing daily summaries: {e}")
+            # Leave the shared session usable for the rest of the tick
+            await db.rollback()
     
-    async def _process_camera_daily_summary(self, db: AsyncSession, camera_id: str, date):
-        """Process daily summary for a specific camera"""
-        try:
-            start_of_day = datetime.combine(date, datetime.min.time())
-            end_of_day = start_of_day + timedelta(days=1)
-            
-            # Total persons detected
-            total_persons_result = await db.execute(
-                select(func.count(Tracking.id))
-                .where(
-                    and_(
-                        Tracking.camera_id == camera_id,
-                        Tracking.object_type == 'person',
-                        Tracking.timestamp >= start_of_day,
-                        Tracking.timestamp < end_of_day
-                    )
+    async def _collect_daily_stats(self, date) -> Dict[str, tuple]:
+        """
+        Aggregate one day of data for all cameras at once.
+        
+        Returns camera_id -> (total_persons, total_detections, peak_hour)
+        """
+        start_of_day = datetime.combine(date, datetime.min.time())
+        end_of_day = start_of_day + timedelta(days=1)
+        
+        # Total persons detected per camera
+        persons_query = (
+            select(Tracking.camera_id, func.count(Tracking.id))
+            .where(
+                and_(
+                    Tracking.object_type == 'person',
+                    Tracking.timestamp >= start_of_day,
+                    Tracking.timestamp < end_of_day
                 )
             )
-            total_persons = total_persons_result.scalar() or 0
-            
-            # Total detections
-            total_detections_result = await db.execute(
-                select(func.count(Detection.id))
-                .where(
-                    and_(
-                        Detection.camera_id == camera_id,
-                        Detection.timestamp >= start_of_day,
-                        Detection.timestamp < end_of_day
-                    )
-                )
+            .group_by(Tracking.camera_id)
+        )
+        
+        # Detections per camera and hour; DISTINCT ON keeps the peak hour (hour
+        # with most detections) of each camera and a window sum gives the total
+        hour = func.extract('hour', Detection.timestamp)
+        hourly = (
+            select(
+                Detection.camera_id.label('camera_id'),
+                hour.label('hour'),
+                func.count(Detection.id).label('count')
             )
-            total_detections = total_detections_result.scalar() or 0
-            
-            # Find peak hour (hour with most detections)
-            peak_hour_result = await db.execute(
-                select(
-                    func.extract('hour', Detection.timestamp).label('hour'),
-                    func.count(Detection.id).label('count')
+            .where(
+                and_(
+                    Detection.timestamp >= start_of_day,
+                    Detection.timestamp < end_of_day
                 )
-                .where(
-                    and_(
-                        Detection.camera_id == camera_id,
-                        Detection.timestamp >= start_of_day,
-                        Detection.timestamp < end_of_day
-                    )
-                )
-                .group_by(func.extract('hour', Detection.timestamp))
-                .order_by(func.count(Detection.id).desc())
-                .limit(1)
             )
-            
-            peak_hour_data = peak_hour_result.first()
-            peak_hour = int(peak_hour_data.hour) if peak_hour_data else 0
-            
-            # Calculate uptime (simplified - assume 100% if we have any data)
-            uptime_percentage = 100.0 if total_detections > 0 else 0.0
-            
-            # Update daily summary
-            await self.analytics_service.update_daily_summary(
-                db, camera_id, date, peak_hour,
-                total_persons, total_detections, uptime_percentage
+            .group_by(Detection.camera_id, hour)
+            .cte('hourly')
+        )
+        peak_query = (
+            select(
+                hourly.c.camera_id,
+                hourly.c.hour,
+                func.sum(hourly.c.count).over(partition_by=hourly.c.camera_id)
             )
-            
-            logger.info(f"Updated daily summary for camera {camera_id}: "
-                       f"persons={total_persons}, detections={total_detections}, peak_hour={peak_hour}")
-                       
-        except Exception as e:
-            logger.error(f"Error processing daily summary for camera {camera_id}: {e}")
+            .distinct(hourly.c.camera_id)
+            .order_by(hourly.c.camera_id, hourly.c.count.desc())
+        )
+        
+        # The two tables are scanned concurrently on separate connections
+        person_rows, peak_rows = await asyncio.gather(
+            self._fetch_all(persons_query),
+            self._fetch_all(peak_query)
+        )
+        person_counts = dict(person_rows)
+        detection_counts = {camera_id: int(total) for camera_id, _, total in peak_rows}
+        peak_hours = {camera_id: int(peak_hour) for camera_id, peak_hour, _ in peak_rows}
+        
+        return {
+            camera_id: (
+                person_counts.get(camera_id, 0),
+                detection_counts.get(camera_id, 0),
+                peak_hours.get(camera_id, 0)
+            )
+            for camera_id in person_counts.keys() | detection_counts.keys()
+        }
+    
+    async def _count_pending_detections(self, cutoff_time: datetime) -> int:
+        """Cheap probe on the pending partial index, capped at the flush threshold"""
+        pending = (
+            select(Detection.id)
+            .where(and_(Detection.aggregated == false(), Detection.processed_at <= cutoff_time))
+            .limit(self.detection_flush_threshold)
+            .subquery()
+        )
+        rows = await self._fetch_all(select(func.count()).select_from(pending))
+        return rows[0][0]
     
-    async def process_detection_aggregation(self):
+    async def process_detection_aggregation(self, db: AsyncSession):
         """Aggregate detection data for better performance"""
         try:
-            logger.info("Starting detection data aggregation")
+            # Process recent detections that haven't been aggregated
+            cutoff_time = datetime.now() - timedelta(minutes=5)
             
-            async with get_db_session() as db:
-                # Process recent detections that haven't been aggregated
-                cutoff_time = datetime.now() - timedelta(minutes=5)
-                
-                detections_result = await db.execute(
-                    select(Detection)
-                    .where(Detection.processed_at <= cutoff_time)
-                    .limit(self.batch_size)
-                )
-                detections = detections_result.scalars().all()
-                
-                if detections:
-                    logger.info(f"Processing {len(detections)} detection records")
-                    
-                    # Group by camera and time window
-                    camera_stats = {}
-                    for detection in detections:
-                        camera_id = detection.camera_id
-                        
-                        if camera_id not in camera_stats:
-                            camera_stats[camera_id] = {
-                                'detection_count': 0,
-                                'object_count': 0,
-                                'last_update': detection.timestamp
-                            }
-                        
-                        camera_stats[camera_id]['detection_count'] += 1
-                        if detection.objects:
-                            camera_stats[camera_id]['object_count'] += len(detection.objects)
-                        
-                        if detection.timestamp > camera_stats[camera_id]['last_update']:
-                            camera_stats[camera_id]['last_update'] = detection.timestamp
-                    
-                    # Update analytics for each camera
-                    for camera_id, stats in camera_stats.items():
-                        await self.analytics_service.update_detection_stats(
-                            db, camera_id, stats['object_count']
-                        )
-                    
-                    logger.info(f"Updated analytics for {len(camera_stats)} cameras")
+            # Idle ticks stop at the probe; otherwise flush once enough rows are
+            # pending or the flush interval has passed
+            pending = await self._count_pending_detections(cutoff_time)
+            if pending and (
+                pending >= self.detection_flush_threshold
+                or time.monotonic() - self._last_detection_flush >= self.detection_flush_interval
+            ):
+                await self._flush_detection_stats(db, cutoff_time)
         
         except Exception as e:
             logger.error(f"Error in detection aggregation: {e}")
+            # Leave the shared session usable for the rest of the tick
+            await db.rollback()
+    
+    async def _aggregate_detection_batch(self, db: AsyncSession, cutoff_time: datetime) -> int:
+        """Claim one batch of pending detections and add it to the summaries; returns the rows claimed"""
+        # Claim the batch and reduce it per camera and UTC hour in a single statement. The
+        # claim runs on the same session as the upsert, which commits both, so a
+        # failed upsert rolls the claim back and each detection is counted once
+        pending_ids = (
+            select(Detection.id)
+            .where(and_(Detection.aggregated == false(), Detection.processed_at <= cutoff_time))
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        batch = (
+            update(Detection)
+            .where(Detection.id.in_(pending_ids))
+            .values(aggregated=True)
+            .returning(Detection.camera_id, Detection.objects, Detection.timestamp)
+            .cte('batch')
+        )
+        # Truncate in UTC whatever the session time zone is, so the buckets line up
+        # with the period_start written by process_hourly_statistics
+        hour = func.timezone('UTC', func.date_trunc('hour', func.timezone('UTC', batch.c.timestamp)))
+        result = await db.execute(
+            select(
+                batch.c.camera_id,
+                hour,
+                func.count(),
+                func.coalesce(func.sum(func.json_array_length(batch.c.objects)), 0)
+            )
+            .group_by(batch.c.camera_id, hour)
+        )
+        camera_stats = result.all()
+        if not camera_stats:
+            await db.commit()
+            return 0
+        
+        rows = []
+        for camera_id, period_start, _, object_count in camera_stats:
+            rows.append({
+                'camera_id': camera_id,
+                'period_start': period_start,
+                'period_end': period_start + timedelta(hours=1),
+                'period_type': 'hour',
+                'total_objects': object_count
+            })
+        
+        await AnalyticsService(db).bulk_upsert_detection_stats(rows)
+        return sum(row[2] for row in camera_stats)
+    
+    async def _flush_detection_stats(self, db: AsyncSession, cutoff_time: datetime):
+        """Aggregate every pending detection up to the cutoff, one transaction per batch"""
+        logger.info("Starting detection data aggregation")
+        self._last_detection_flush = time.monotonic()
+        
+        total = 0
+        while True:
+            claimed = await self._aggregate_detection_batch(db, cutoff_time)
+            total += claimed
+            if claimed < self.batch_size:
+                break
+        
+        logger.info(f"Aggregated {total} detection records")
+    
+    def _next_boundaries(self) -> tuple:
+        """Epoch timestamps of the next local hour and day boundaries"""
+        now = datetime.now()
+        next_hour = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        next_day = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        return next_hour.timestamp(), next_day.timestamp()
     
     async def run_processor(self):
         """Main processing loop"""
         logger.info("Starting data processor")
         
-        last_hourly_process = datetime.now().replace(minute=0, second=0, microsecond=0)
-        last_daily_process = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        # Boundaries are computed once and then advanced, not rebuilt every tick
+        next_hour_epoch, next_day_epoch = self._next_boundaries()
         
         while True:
             try:
-                current_time = datetime.now()
-                
-                # Run detection aggregation every processing interval
-                await self.process_detection_aggregation()
-                
-                # Run hourly processing at the start of each hour
-                current_hour = current_time.replace(minute=0, second=0, microsecond=0)
-                if current_hour > last_hourly_process:
-                    await self.process_hourly_statistics()
-                    last_hourly_process = current_hour
-                
-                # Run daily processing once per day at midnight
-                current_day = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
-                if current_day > last_daily_process:
-                    await self.process_daily_summaries()
-                    last_daily_process = current_day
+                # One session per tick for all writes; it only checks out a
+                # connection once something is actually written
+                async with get_db_context() as db:
+                    # Run detection aggregation every processing interval
+                    await self.process_detection_aggregation(db)
+                    
+                    now = time.time()
+                    
+                    # Run hourly processing at the start of each hour
+                    if now >= next_hour_epoch:
+                        await self.process_hourly_statistics(db)
+                        next_hour_epoch += 3600
+                    
+                    # Run daily processing once per day at midnight; recomputed from
+                    # the calendar so DST changes do not shift it
+                    if now >= next_day_epoch:
+                        await self.process_daily_summaries(db)
+                        next_hour_epoch, next_day_epoch = self._next_boundaries()
                 
-                # Wait for next processing cycle
-                await asyncio.sleep(self.processing_interval)
+                # Wake at the next boundary if it comes before the next cycle
+                now = time.time()
+                await asyncio.sleep(max(
+                    0, min(next_hour_epoch, next_day_epoch, now + self.processing_interval) - now
+                ))
                 
             except Exception as e:
                 logger.error(f"Error in data processor main loop: {e}")
@@ -295,4 +411,6 @@ async def run_data_processor():
         logger.error(f"Data processor error: {e}")
 
 if __name__ == "__main__":
+    from app.workers import install_uvloop
+    install_uvloop()
     asyncio.run(run_data_processor())
\ No newline at end of file
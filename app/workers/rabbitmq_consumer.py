@@ -1,30 +1,56 @@
-import json
+import orjson
 import logging
 import asyncio
+import signal
+import sys
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 import aio_pika
 from aio_pika import IncomingMessage
 
 from app.core.database import get_db_session
 from app.services.detection_service import DetectionService
 from app.services.tracking_service import TrackingService
+from app.workers.rabbitmq_utils import RABBITMQ_URL
 from app.config import settings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class RabbitMQConsumer:
-    def __init__(self):
+    # Queue name -> callback method; consume only a subset to spread queues over processes
+    QUEUE_CALLBACKS = {
+        'camera_event_queue': 'process_camera_event',
+        'detection_queue': 'detection_callback',
+        'tracking_queue': 'tracking_callback',
+        'face_recognition_queue': 'face_callback',
+    }
+
+    def __init__(self, queue_names: Optional[List[str]] = None):
         self.connection: Optional[aio_pika.Connection] = None
         self.channel: Optional[aio_pika.Channel] = None
+        # Handled messages are acked together with multiple=True, every
+        # ack_batch_size messages or ack_flush_interval seconds
+        self.prefetch_count = settings.rabbitmq_prefetch_count
+        self.ack_batch_size = 32
+        self.ack_flush_interval = 0.2
+        self._last_unacked: Optional[IncomingMessage] = None
+        self._unacked_count = 0
+        self._ack_flusher: Optional[asyncio.Task] = None
+        # Exchange and queues declared once per connection; the robust
+        # connection re-declares them itself after a reconnect
+        self.queues: Dict[str, Any] = {}
+        self._consumer_tags: List[Tuple[Any, str]] = []
+        self._stop = asyncio.Event()
+        self.queue_names = queue_names or list(self.QUEUE_CALLBACKS)
 
     async def connect(self):
         try:
-            rabbitmq_url = f"amqp://{getattr(settings, 'RABBITMQ_USER', 'guest')}:{getattr(settings, 'RABBITMQ_PASS', 'guest')}@{getattr(settings, 'RABBITMQ_HOST', 'localhost')}:{getattr(settings, 'RABBITMQ_PORT', 5672)}/"
-            self.connection = await aio_pika.connect_robust(rabbitmq_url)
+            self.connection = await aio_pika.connect_robust(RABBITMQ_URL)
             self.channel = await self.connection.channel()
-            await self.channel.set_qos(prefetch_count=1)
+            await self.channel.set_qos(prefetch_count=self.prefetch_count)
+            self.queues = await self.setup_queues()
             logger.info("Connected to RabbitMQ successfully")
             return True
         except Exception as e:
@@ -57,39 +83,107 @@ class RabbitMQConsumer:
             'camera_event_queue': camera_event_queue
         }
 
+    async def _flush_acks(self):
+        """Ack every handled message up to the latest one in a single frame"""
+        message, self._last_unacked, self._unacked_count = self._last_unacked, None, 0
+        if message is not None:
+            await message.ack(multiple=True)
+
+    async def _flush_acks_periodically(self):
+        while True:
+            await asyncio.sleep(self.ack_flush_interval)
+            try:
+                await self._flush_acks()
+            except Exception as e:
+                # Unacked deliveries are redelivered once the channel recovers
+                logger.error(f"Failed to ack messages: {e}")
+
+    @asynccontextmanager
+    async def _batched_ack(self, message: IncomingMessage):
+        """
+        Like message.process(), but defers the ack to the next batched flush.
+
+        All queues share one channel and multiple=True acks every earlier delivery
+        tag on it, so every callback must use this instead of message.process().
+
+        Invariant: the body under this context manager must not await. With
+        prefetch > 1 callbacks run concurrently; a callback suspended inside the
+        body would let a later message's flush ack its delivery tag before it was
+        handled, and its reject on failure would then hit an already-acked tag.
+        A callback that needs I/O has to move it after the ack (e.g. hand the
+        record to a buffered writer) or the queue needs its own channel.
+        """
+        try:
+            yield
+        except Exception:
+            # Ack what was handled before this message, then reject it on its own
+            await self._flush_acks()
+            await message.reject()
+            raise
+        self._last_unacked = message
+        self._unacked_count += 1
+        if self._unacked_count >= self.ack_batch_size:
+            await self._flush_acks()
+
+    @staticmethod
+    def _log_message(kind: str, message: IncomingMessage, body):
+        """Log a one-line summary of a high-rate message; the full body only at DEBUG"""
+        # %-style arguments are only formatted if a handler actually emits the record
+        logger.info("%s message routing_key=%s size=%d", kind, message.routing_key, len(message.body))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s message body: %r", kind, body)
+
     async def process_camera_event(self, message: IncomingMessage):
-        async with message.process():
-            body = json.loads(message.body.decode())
-            logger.info(f"Camera Event received: {body}")
+        async with self._batched_ack(message):
+            body = orjson.loads(message.body)
+            logger.info("Camera Event received: %s", body)
             # TODO: gửi tới ROS
-            logger.info(f"[ROS] Would publish to ROS: {body}")
+            logger.info("[ROS] Would publish to ROS: %s", body)
 
     async def start_consuming(self):
-        queues = await self.setup_queues()
-        await queues['camera_event_queue'].consume(self.process_camera_event, no_ack=False)
-        await queues['detection_queue'].consume(self.detection_callback, no_ack=False)
-        await queues['tracking_queue'].consume(self.tracking_callback, no_ack=False)
-        await queues['face_recognition_queue'].consume(self.face_callback, no_ack=False)
-        logger.info("Started consuming from all queues")
-        await asyncio.Future()  # keep running
+        queues = self.queues or await self.setup_queues()
+        self._ack_flusher = asyncio.create_task(self._flush_acks_periodically())
+        for queue_name in self.queue_names:
+            queue = queues[queue_name]
+            callback = getattr(self, self.QUEUE_CALLBACKS[queue_name])
+            self._consumer_tags.append((queue, await queue.consume(callback, no_ack=False)))
+        logger.info("Started consuming from %s", ", ".join(self.queue_names))
+        # Run until stop() is called or the task is cancelled on shutdown
+        try:
+            await self._stop.wait()
+        finally:
+            # Stop deliveries first so nothing new arrives while acks are flushed
+            for queue, consumer_tag in self._consumer_tags:
+                try:
+                    await queue.cancel(consumer_tag)
+                except Exception as e:
+                    logger.warning(f"Failed to cancel consumer {consumer_tag}: {e}")
+            self._consumer_tags.clear()
+
+    def stop(self):
+        """Ask start_consuming to return"""
+        self._stop.set()
 
     async def detection_callback(self, message: IncomingMessage):
-        async with message.process():
-            body = json.loads(message.body.decode())
-            logger.info(f"Detection message: {body}")
+        async with self._batched_ack(message):
+            body = orjson.loads(message.body)
+            self._log_message("Detection", message, body)
 
     async def tracking_callback(self, message: IncomingMessage):
-        async with message.process():
-            body = json.loads(message.body.decode())
-            logger.info(f"Tracking message: {body}")
+        async with self._batched_ack(message):
+            body = orjson.loads(message.body)
+            self._log_message("Tracking", message, body)
 
     async def face_callback(self, message: IncomingMessage):
-        async with message.process():
-            body = json.loads(message.body.decode())
-            logger.info(f"Face message: {body}")
+        async with self._batched_ack(message):
+            body = orjson.loads(message.body)
+            self._log_message("Face", message, body)
 
     async def close(self):
+        if self._ack_flusher:
+            self._ack_flusher.cancel()
         if self.connection and not self.connection.is_closed:
+            await self._flush_acks()
             await self.connection.close()
             logger.info("RabbitMQ connection closed")
 
@@ -97,7 +191,26 @@ consumer = RabbitMQConsumer()
 
 async def run_consumer():
     if await consumer.connect():
-        await consumer.start_consuming()
+        try:
+            await consumer.start_consuming()
+        finally:
+            # Flush pending acks and close, so in-flight messages are not redelivered
+            await consumer.close()
+
+async def _main(queue_names: List[str]):
+    # e.g. `python -m app.workers.rabbitmq_consumer detection_queue` runs one
+    # process per hot queue, each with its own connection and prefetch window
+    if queue_names:
+        consumer.queue_names = queue_names
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, consumer.stop)
+    await run_consumer()
 
 if __name__ == "__main__":
-    asyncio.run(run_consumer())
+    from app.workers import install_uvloop
+    install_uvloop()
+    unknown = set(sys.argv[1:]) - set(RabbitMQConsumer.QUEUE_CALLBACKS)
+    if unknown:
+        sys.exit(f"Unknown queues: {', '.join(sorted(unknown))}")
+    asyncio.run(_main(sys.argv[1:]))
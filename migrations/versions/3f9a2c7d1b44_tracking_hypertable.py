@@ -0,0 +1,48 @@
+"""convert tracking table to a TimescaleDB hypertable
+
+Revision ID: 3f9a2c7d1b44
+Revises: 123456789abc
+Create Date: 2025-09-02 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '3f9a2c7d1b44'
+down_revision = '123456789abc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nothing to change until the table exists; Base.metadata.create_all
+    # creates it later with this schema already applied
+    if not sa.inspect(op.get_bind()).has_table('tracking'):
+        return
+
+    # Only convert when the TimescaleDB extension is installed on the server
+    conn = op.get_bind()
+    available = conn.execute(sa.text(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'timescaledb'"
+    )).scalar()
+    if not available:
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS timescaledb")
+
+    # Unique constraints on a hypertable must include the partitioning column
+    op.drop_constraint('pk_tracking', 'tracking', type_='primary')
+    op.create_primary_key('pk_tracking', 'tracking', ['id', 'timestamp'])
+
+    # One chunk per day, so retention becomes drop_chunks instead of row deletes
+    op.execute(
+        "SELECT create_hypertable('tracking', 'timestamp', "
+        "chunk_time_interval => INTERVAL '1 day', "
+        "migrate_data => true, if_not_exists => true)"
+    )
+
+
+def downgrade():
+    # A hypertable cannot be converted back in place; data would have to be
+    # copied into a new plain table, which is left to a manual migration.
+    pass
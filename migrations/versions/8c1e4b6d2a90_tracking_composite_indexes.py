@@ -0,0 +1,48 @@
+"""add (camera_id, track_id, timestamp) index on tracking
+
+Revision ID: 8c1e4b6d2a90
+Revises: 3f9a2c7d1b44
+Create Date: 2025-09-03 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '8c1e4b6d2a90'
+down_revision = '3f9a2c7d1b44'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nothing to change until the table exists; Base.metadata.create_all
+    # creates it later with this schema already applied
+    if not sa.inspect(op.get_bind()).has_table('tracking'):
+        return
+
+    # Hypertables do not support CREATE INDEX CONCURRENTLY
+    conn = op.get_bind()
+    hypertable = conn.execute(sa.text(
+        "SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'"
+    )).scalar() and conn.execute(sa.text(
+        "SELECT 1 FROM timescaledb_information.hypertables "
+        "WHERE hypertable_name = 'tracking'"
+    )).scalar()
+    concurrently = "" if hypertable else "CONCURRENTLY"
+
+    with op.get_context().autocommit_block():
+        # Per-track lookups filter on camera_id + track_id and order by timestamp
+        op.execute(
+            f"CREATE INDEX {concurrently} IF NOT EXISTS idx_tracking_camera_track_timestamp "
+            "ON tracking (camera_id, track_id, timestamp)"
+        )
+        # Prefix of the new index, no longer needed
+        op.execute(f"DROP INDEX {concurrently} IF EXISTS idx_tracking_camera_track")
+
+
+def downgrade():
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tracking_camera_track "
+        "ON tracking (camera_id, track_id)"
+    )
+    op.execute("DROP INDEX IF EXISTS idx_tracking_camera_track_timestamp")
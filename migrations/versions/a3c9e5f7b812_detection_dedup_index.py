@@ -0,0 +1,70 @@
+"""unique (camera_id, timestamp, frame_id) on detections for idempotent inserts
+
+Revision ID: a3c9e5f7b812
+Revises: f4b8d1a6c233
+Create Date: 2025-09-08 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'a3c9e5f7b812'
+down_revision = 'f4b8d1a6c233'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nothing to change until the table exists; Base.metadata.create_all
+    # creates it later with this schema already applied
+    if not sa.inspect(op.get_bind()).has_table('detections'):
+        return
+
+    conn = op.get_bind()
+
+    # NULLs are distinct in a unique index, so frames without an id would never
+    # be deduplicated; store them under the "" sentinel instead
+    op.execute("UPDATE detections SET frame_id = '' WHERE frame_id IS NULL")
+    op.alter_column(
+        'detections', 'frame_id',
+        existing_type=sa.String(100), server_default='', nullable=False
+    )
+
+    # Refuse to run over existing duplicates rather than deleting stored rows;
+    # they have to be reviewed and merged by hand before the index can exist
+    duplicates = conn.execute(sa.text(
+        "SELECT count(*) FROM ("
+        "SELECT 1 FROM detections "
+        "GROUP BY camera_id, timestamp, frame_id HAVING count(*) > 1"
+        ") dup"
+    )).scalar()
+    if duplicates:
+        raise RuntimeError(
+            f"{duplicates} (camera_id, timestamp, frame_id) groups in detections have "
+            "more than one row; merge them before creating idx_detections_dedup"
+        )
+
+    # Hypertables do not support CREATE INDEX CONCURRENTLY
+    hypertable = conn.execute(sa.text(
+        "SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'"
+    )).scalar() and conn.execute(sa.text(
+        "SELECT 1 FROM timescaledb_information.hypertables "
+        "WHERE hypertable_name = 'detections'"
+    )).scalar()
+    concurrently = "" if hypertable else "CONCURRENTLY"
+
+    with op.get_context().autocommit_block():
+        # Conflict target for INSERT ... ON CONFLICT DO NOTHING on redelivered messages
+        op.execute(
+            f"CREATE UNIQUE INDEX {concurrently} IF NOT EXISTS idx_detections_dedup "
+            "ON detections (camera_id, timestamp, frame_id)"
+        )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_detections_dedup")
+    op.alter_column(
+        'detections', 'frame_id',
+        existing_type=sa.String(100), server_default=None, nullable=True
+    )
+    op.execute("UPDATE detections SET frame_id = NULL WHERE frame_id = ''")
@@ -0,0 +1,48 @@
+"""make detection_summaries (camera_id, period_start, period_type) unique
+
+Revision ID: b5d7e2f4a613
+Revises: 8c1e4b6d2a90
+Create Date: 2025-09-04 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'b5d7e2f4a613'
+down_revision = '8c1e4b6d2a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nothing to change until the table exists; Base.metadata.create_all
+    # creates it later with this schema already applied
+    if not sa.inspect(op.get_bind()).has_table('detection_summaries'):
+        return
+
+    # Keep the newest row of each period before enforcing uniqueness
+    op.execute(
+        "DELETE FROM detection_summaries a USING detection_summaries b "
+        "WHERE a.camera_id = b.camera_id "
+        "AND a.period_start = b.period_start "
+        "AND a.period_type = b.period_type "
+        "AND a.id < b.id"
+    )
+
+    # Conflict target for the bulk upsert of hourly/daily summaries
+    op.drop_index('idx_summary_camera_period', table_name='detection_summaries')
+    op.create_index(
+        'idx_summary_camera_period',
+        'detection_summaries',
+        ['camera_id', 'period_start', 'period_type'],
+        unique=True
+    )
+
+
+def downgrade():
+    op.drop_index('idx_summary_camera_period', table_name='detection_summaries')
+    op.create_index(
+        'idx_summary_camera_period',
+        'detection_summaries',
+        ['camera_id', 'period_start', 'period_type']
+    )
@@ -0,0 +1,30 @@
+"""running per-track aggregate columns on tracking
+
+Revision ID: c6e1f3a8d925
+Revises: a3c9e5f7b812
+Create Date: 2025-09-09 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'c6e1f3a8d925'
+down_revision = 'a3c9e5f7b812'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # tracking may not exist yet; Base.metadata.create_all then creates it with the columns
+    if not sa.inspect(op.get_bind()).has_table('tracking'):
+        return
+
+    # The latest row of each track carries these for the whole track; existing
+    # tracks stay NULL and are seeded from their rows on the next insert
+    op.execute("ALTER TABLE tracking ADD COLUMN IF NOT EXISTS max_velocity DOUBLE PRECISION")
+    op.execute("ALTER TABLE tracking ADD COLUMN IF NOT EXISTS confidence_sum DOUBLE PRECISION")
+
+
+def downgrade():
+    op.execute("ALTER TABLE tracking DROP COLUMN IF EXISTS confidence_sum")
+    op.execute("ALTER TABLE tracking DROP COLUMN IF EXISTS max_velocity")
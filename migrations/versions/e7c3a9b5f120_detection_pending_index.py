@@ -0,0 +1,43 @@
+"""aggregated flag and pending partial index on detections
+
+Revision ID: e7c3a9b5f120
+Revises: d2a8f1c9e357
+Create Date: 2025-09-06 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'e7c3a9b5f120'
+down_revision = 'd2a8f1c9e357'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nothing to change until the table exists; Base.metadata.create_all
+    # creates it later with this schema already applied
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('detections'):
+        return
+
+    # Existing rows count as already aggregated; adding the column with a
+    # constant default and then switching the default does not rewrite the table
+    if 'aggregated' not in {column['name'] for column in inspector.get_columns('detections')}:
+        op.add_column(
+            'detections',
+            sa.Column('aggregated', sa.Boolean(), server_default=sa.true(), nullable=False)
+        )
+        op.alter_column('detections', 'aggregated', server_default=sa.false())
+
+    with op.get_context().autocommit_block():
+        # Range scan over rows the data processor has not counted yet
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_detections_pending "
+            "ON detections (processed_at) WHERE aggregated = false"
+        )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_detections_pending")
+    op.drop_column('detections', 'aggregated')
@@ -17,10 +17,12 @@ depends_on = None
 
 
 def upgrade():
-    # Xóa bảng cũ nếu tồn tại
-    op.execute("DROP TABLE IF EXISTS cameras CASCADE;")
+    # Bảng có thể đã được tạo bởi Base.metadata.create_all khi app khởi động;
+    # giữ nguyên dữ liệu thay vì DROP ... CASCADE rồi tạo lại
+    if sa.inspect(op.get_bind()).has_table('cameras'):
+        return
     
-    # Tạo bảng cameras mới
+    # Tạo bảng cameras
     op.create_table(
         'cameras',
         sa.Column('id', sa.Integer, primary_key=True, index=True),
@@ -16,7 +16,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from app.config import settings
 from app.core.database import init_database
 from app.core.rabbitmq import init_rabbitmq
-from app.workers import start_background_consumers, stop_background_consumers
+from app.workers import start_background_consumers, stop_background_consumers, install_uvloop
 
 # Setup logging
 logging.basicConfig(
@@ -106,5 +106,6 @@ async def main():
     return 0
 
 if __name__ == "__main__":
+    install_uvloop()
     exit_code = asyncio.run(main())
     sys.exit(exit_code)
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""
+Shared test fixtures.
+
+Database tests run against a real PostgreSQL given by TEST_DATABASE_URL
+(asyncpg URL) and are skipped when it is not set; see tests/README.md.
+"""
+
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+# NullPool: pytest-asyncio runs every test on a fresh event loop
+os.environ.setdefault("ENVIRONMENT", "development")
+os.environ["DATABASE_URL"] = os.getenv(
+    "TEST_DATABASE_URL", "postgresql+asyncpg://postgres@localhost/smart_camera_test"
+)
+
+import pytest
+import pytest_asyncio
+
+from app.core.database import Base, db_manager, get_db_context
+import app.models.camera  # noqa: F401
+import app.models.detection  # noqa: F401
+import app.models.tracking  # noqa: F401
+import app.models.face_recognition  # noqa: F401
+from app.models.camera import Camera
+
+
+@pytest_asyncio.fixture
+async def database():
+    """Fresh schema with one active camera; its id is "1" since the create schemas carry integer ids"""
+    if not os.getenv("TEST_DATABASE_URL"):
+        pytest.skip("TEST_DATABASE_URL is not set (see tests/README.md)")
+    
+    db_manager.initialize()
+    async with db_manager.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    
+    async with get_db_context() as db:
+        db.add(Camera(camera_id="1", name="Camera 1"))
+        await db.commit()
+    
+    yield db_manager
+    await db_manager.close()
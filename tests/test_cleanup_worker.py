@@ -0,0 +1,59 @@
+"""
+Expired-row deletes in the cleanup worker
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.database import get_db_context
+from app.models.detection import Detection
+from app.workers import cleanup_worker
+from app.workers.cleanup_worker import CleanupWorker
+
+
+async def _add_detections(timestamps):
+    async with get_db_context() as db:
+        for i, timestamp in enumerate(timestamps):
+            db.add(Detection(
+                camera_id="1",
+                timestamp=timestamp,
+                frame_id=f"frame-{i}",
+                objects=[],
+                object_count=0
+            ))
+        await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_delete_skips_empty_slices_and_caps_batches(database, monkeypatch):
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=30)
+    # A year-long gap between two dense bursts, plus rows newer than the cutoff
+    old_burst = [now - timedelta(days=400, seconds=i) for i in range(5)]
+    recent_burst = [now - timedelta(days=40, seconds=i) for i in range(3)]
+    kept = [now - timedelta(days=1, seconds=i) for i in range(2)]
+    await _add_detections(old_burst + recent_burst + kept)
+
+    batches = 0
+    real_sleep = cleanup_worker.asyncio.sleep
+
+    async def counting_sleep(delay):
+        nonlocal batches
+        batches += 1
+        await real_sleep(delay)
+
+    monkeypatch.setattr(cleanup_worker.asyncio, "sleep", counting_sleep)
+    worker = CleanupWorker()
+    worker.batch_size = 2
+
+    async with get_db_context() as db:
+        deleted = await worker._delete_by_time_slices(db, Detection, cutoff, "detection")
+
+    assert deleted == 8
+    # 5 rows in batches of 2, then 3 rows in batches of 2; the empty hours
+    # between the bursts cost nothing
+    assert batches == 5
+    async with get_db_context() as db:
+        assert await db.scalar(select(func.count()).select_from(Detection)) == 2
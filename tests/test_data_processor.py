@@ -0,0 +1,142 @@
+"""
+Detection aggregation in the data processor
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app.core.database import get_db_context
+from app.models.detection import Detection, DetectionSummary
+from app.services.analytics_service import AnalyticsService
+from app.workers.data_processor import DataProcessor
+
+
+def _hour_ago() -> datetime:
+    return datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
+
+
+async def _add_detections(count: int, objects_per_frame: int = 2, start: datetime = None):
+    """Store `count` frames that are old enough to be aggregated"""
+    start = start or _hour_ago()
+    async with get_db_context() as db:
+        for i in range(count):
+            db.add(Detection(
+                camera_id="1",
+                timestamp=start + timedelta(seconds=i),
+                frame_id=f"frame-{start.timestamp():.0f}-{i}",
+                objects=[{"type": "person", "confidence": 0.9}] * objects_per_frame,
+                object_count=objects_per_frame,
+                processed_at=datetime.now(timezone.utc) - timedelta(minutes=10)
+            ))
+        await db.commit()
+
+
+async def _pending_count() -> int:
+    async with get_db_context() as db:
+        return await db.scalar(
+            select(func.count()).select_from(Detection).where(Detection.aggregated.is_(False))
+        )
+
+
+@pytest.mark.asyncio
+async def test_aggregation_claims_every_batch(database):
+    await _add_detections(5)
+    processor = DataProcessor()
+    processor.batch_size = 2
+    processor.detection_flush_interval = 0
+
+    async with get_db_context() as db:
+        await processor.process_detection_aggregation(db)
+
+    assert await _pending_count() == 0
+    async with get_db_context() as db:
+        total_objects = await db.scalar(select(func.sum(DetectionSummary.total_objects)))
+    assert total_objects == 10
+
+
+@pytest.mark.asyncio
+async def test_failed_upsert_leaves_detections_pending(database, monkeypatch):
+    await _add_detections(3)
+    processor = DataProcessor()
+    processor.detection_flush_interval = 0
+
+    async def failing_upsert(self, rows):
+        raise RuntimeError("summary write failed")
+
+    monkeypatch.setattr(AnalyticsService, "bulk_upsert_detection_stats", failing_upsert)
+    async with get_db_context() as db:
+        await processor.process_detection_aggregation(db)
+
+    # The claim was rolled back together with the failed upsert
+    assert await _pending_count() == 3
+    async with get_db_context() as db:
+        assert await db.scalar(select(func.count()).select_from(DetectionSummary)) == 0
+
+
+@pytest.mark.asyncio
+async def test_flush_waits_for_interval_or_threshold(database):
+    await _add_detections(3)
+    processor = DataProcessor()
+
+    async with get_db_context() as db:
+        await processor.process_detection_aggregation(db)
+    assert await _pending_count() == 3
+
+    processor.detection_flush_threshold = 3
+    async with get_db_context() as db:
+        await processor.process_detection_aggregation(db)
+    assert await _pending_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_stats_are_bucketed_per_utc_hour(database):
+    hour = _hour_ago()
+    await _add_detections(3, objects_per_frame=1, start=hour - timedelta(hours=1))
+    await _add_detections(2, objects_per_frame=4, start=hour)
+    processor = DataProcessor()
+    processor.detection_flush_interval = 0
+
+    async with get_db_context() as db:
+        # The buckets must not depend on the session time zone
+        await db.execute(text("SET TIME ZONE 'Asia/Kolkata'"))
+        await processor.process_detection_aggregation(db)
+        result = await db.execute(
+            select(DetectionSummary.period_start, DetectionSummary.total_objects)
+            .order_by(DetectionSummary.period_start)
+        )
+        rows = [tuple(row) for row in result.all()]
+
+    assert rows == [
+        (hour - timedelta(hours=1), 3),
+        (hour, 8)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_hourly_job_owns_detection_count(database):
+    hour = _hour_ago()
+    await _add_detections(2, objects_per_frame=1, start=hour)
+    processor = DataProcessor()
+    processor.detection_flush_interval = 0
+
+    async with get_db_context() as db:
+        await processor.process_detection_aggregation(db)
+        await processor.process_hourly_statistics(db)
+
+    # A detection processed late in the hour is aggregated after the hourly job
+    await _add_detections(1, objects_per_frame=1, start=hour + timedelta(minutes=59))
+    async with get_db_context() as db:
+        await processor.process_detection_aggregation(db)
+        result = await db.execute(
+            select(
+                DetectionSummary.period_start,
+                DetectionSummary.total_detections,
+                DetectionSummary.total_objects
+            )
+        )
+        rows = [tuple(row) for row in result.all()]
+
+    # One row for the hour; the late detection only adds its objects
+    assert rows == [(hour, 2, 3)]
@@ -0,0 +1,134 @@
+"""
+Detection ingestion through DetectionService
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.database import get_db_context
+from app.models.detection import Detection
+from app.schemas.detection import BulkDetectionCreate, DetectionCreate
+from app.services.detection_service import DetectionService
+
+FRAME_TIME = datetime(2024, 5, 1, 8, 30, tzinfo=timezone.utc)
+
+
+def _detection(frame_id: str, class_name: str, confidence: float) -> DetectionCreate:
+    return DetectionCreate(
+        camera_id=1,
+        timestamp=FRAME_TIME,
+        frame_id=frame_id,
+        class_name=class_name,
+        confidence=confidence,
+        bbox={"x": 0.1, "y": 0.2, "width": 0.3, "height": 0.4},
+        additional_data={"raw_data": f"[cam] {frame_id}"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_stores_one_row_per_frame(database):
+    bulk = BulkDetectionCreate(detections=[
+        _detection("f1", "person", 0.9),
+        _detection("f1", "car", 0.5),
+        _detection("f1", "person", 0.7),
+        _detection("f2", "dog", 0.6)
+    ])
+
+    async with get_db_context() as db:
+        detections = await DetectionService(db).create_bulk_detections(bulk)
+
+    frames = {detection.frame_id: detection for detection in detections}
+    assert sorted(frames) == ["f1", "f2"]
+
+    frame = frames["f1"]
+    assert frame.camera_id == "1"
+    assert frame.object_count == 3
+    assert [obj["type"] for obj in frame.objects] == ["person", "car", "person"]
+    assert frame.objects[0]["bbox"] == {"x": 0.1, "y": 0.2, "width": 0.3, "height": 0.4}
+    assert frame.confidence_avg == pytest.approx(0.7)
+    assert frame.confidence_max == pytest.approx(0.9)
+    assert frame.raw_data == "[cam] f1"
+    assert frames["f2"].object_count == 1
+
+
+@pytest.mark.asyncio
+async def test_create_detection_stores_single_object_frame(database):
+    async with get_db_context() as db:
+        detection = await DetectionService(db).create_detection(_detection("f1", "person", 0.8))
+
+    assert detection.object_count == 1
+    assert detection.objects[0]["type"] == "person"
+    assert detection.confidence_avg == detection.confidence_max == pytest.approx(0.8)
+
+    async with get_db_context() as db:
+        assert await db.scalar(select(func.count()).select_from(Detection)) == 1
+
+
+@pytest.mark.asyncio
+async def test_redelivered_bulk_inserts_nothing(database):
+    bulk = BulkDetectionCreate(detections=[
+        _detection("f1", "person", 0.9),
+        _detection("f1", "car", 0.5),
+        _detection("f2", "dog", 0.6)
+    ])
+
+    async with get_db_context() as db:
+        assert len(await DetectionService(db).create_bulk_detections(bulk)) == 2
+    async with get_db_context() as db:
+        assert await DetectionService(db).create_bulk_detections(bulk) == []
+
+    async with get_db_context() as db:
+        result = await db.execute(select(Detection.frame_id, Detection.object_count).order_by(Detection.frame_id))
+        # Every object of the frame survives the dedup key
+        assert [tuple(row) for row in result.all()] == [("f1", 2), ("f2", 1)]
+
+
+@pytest.mark.asyncio
+async def test_objects_posted_separately_share_their_frame(database):
+    async with get_db_context() as db:
+        service = DetectionService(db)
+        await service.create_detection(_detection("f1", "person", 0.9))
+        detection = await service.create_detection(_detection("f1", "car", 0.5))
+        # Posting an object the frame already holds changes nothing
+        again = await service.create_detection(_detection("f1", "car", 0.5))
+
+    assert detection.object_count == again.object_count == 2
+    assert [obj["type"] for obj in detection.objects] == ["person", "car"]
+    assert detection.confidence_avg == pytest.approx(0.7)
+    assert detection.confidence_max == pytest.approx(0.9)
+
+    async with get_db_context() as db:
+        assert await db.scalar(select(func.count()).select_from(Detection)) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_appends_new_objects_to_stored_frame(database):
+    async with get_db_context() as db:
+        service = DetectionService(db)
+        await service.create_bulk_detections(BulkDetectionCreate(detections=[_detection("f1", "person", 0.9)]))
+        detections = await service.create_bulk_detections(BulkDetectionCreate(detections=[
+            _detection("f1", "person", 0.9),
+            _detection("f1", "dog", 0.3)
+        ]))
+
+    assert len(detections) == 1
+    assert [obj["type"] for obj in detections[0].objects] == ["person", "dog"]
+    assert detections[0].object_count == 2
+    assert detections[0].confidence_avg == pytest.approx(0.6)
+
+
+@pytest.mark.asyncio
+async def test_frames_without_id_are_deduplicated(database):
+    detection = _detection("unused", "person", 0.9).model_copy(update={"frame_id": None})
+    bulk = BulkDetectionCreate(detections=[detection])
+
+    async with get_db_context() as db:
+        service = DetectionService(db)
+        assert len(await service.create_bulk_detections(bulk)) == 1
+        assert await service.create_bulk_detections(bulk) == []
+
+    async with get_db_context() as db:
+        result = await db.execute(select(Detection.frame_id))
+        assert result.scalars().all() == [""]
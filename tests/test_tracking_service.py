@@ -0,0 +1,84 @@
+"""
+Tracking ingestion and per-track summaries through TrackingService
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.database import get_db_context
+from app.schemas.tracking import TrackingCreate, TrackingFilter
+from app.services.tracking_service import TrackingService
+
+START = datetime(2024, 5, 1, 8, 0, tzinfo=timezone.utc)
+
+
+def _point(seconds: int, x: float, y: float, confidence: float = 0.8) -> TrackingCreate:
+    return TrackingCreate(
+        camera_id=1,
+        track_id="7",
+        object_class="person",
+        bbox_x=x,
+        bbox_y=y,
+        bbox_width=0.1,
+        bbox_height=0.2,
+        confidence=confidence,
+        timestamp=START + timedelta(seconds=seconds)
+    )
+
+
+async def _summary_and_full_pass():
+    async with get_db_context() as db:
+        service = TrackingService(db)
+        summary = await service.create_tracking_summary("7", 1)
+        stats = await service._get_track_stats("7", 1)
+    return summary, stats
+
+
+@pytest.mark.asyncio
+async def test_summary_reads_running_aggregate(database):
+    async with get_db_context() as db:
+        service = TrackingService(db)
+        for seconds, x, confidence in [(0, 0.1, 0.5), (10, 0.3, 0.7), (20, 0.4, 0.9)]:
+            latest = await service.create_tracking(_point(seconds, x, 0.2, confidence))
+
+    assert latest.frames_tracked == 3
+    assert latest.first_seen == START
+
+    summary, stats = await _summary_and_full_pass()
+    assert summary["total_frames"] == 3
+    assert summary["avg_confidence"] == pytest.approx(0.7)
+    assert summary["path_length"] == pytest.approx(0.3)
+    assert summary["max_velocity"] == pytest.approx(0.02)
+    assert summary["path_length"] == pytest.approx(float(stats.path_length))
+
+
+@pytest.mark.asyncio
+async def test_out_of_order_rows_are_folded_into_latest_row(database):
+    async with get_db_context() as db:
+        service = TrackingService(db)
+        for seconds, x, y in [(0, 0.1, 0.2), (20, 0.5, 0.2), (30, 0.6, 0.2)]:
+            await service.create_tracking(_point(seconds, x, y))
+        # Late arrivals: one inside the path, one before its start
+        await service.create_tracking(_point(10, 0.3, 0.6, confidence=0.2))
+        await service.create_tracking(_point(-10, 0.1, 0.0))
+
+    summary, stats = await _summary_and_full_pass()
+    assert summary["first_seen"] == START - timedelta(seconds=10)
+    assert summary["last_seen"] == START + timedelta(seconds=30)
+    assert summary["total_frames"] == stats.total_frames == 5
+    assert summary["avg_confidence"] == pytest.approx(float(stats.avg_confidence))
+    assert summary["path_length"] == pytest.approx(float(stats.path_length))
+    assert summary["max_velocity"] == pytest.approx(float(stats.max_velocity))
+
+
+def test_ids_are_validated_at_the_schema_boundary():
+    point = _point(0, 0.1, 0.2)
+    assert point.camera_id == "1"
+    assert point.track_id == 7
+    assert TrackingFilter(camera_id=1, track_ids=["7"]).track_ids == [7]
+
+    # A non-numeric track id is a 422, not a 500 from the service
+    with pytest.raises(ValidationError):
+        TrackingCreate.model_validate({**point.model_dump(), "track_id": "abc"})
@@ -0,0 +1,40 @@
+"""
+Worker restarts in the background worker monitor
+"""
+
+import pytest
+
+import app.workers as workers
+
+
+async def _crash():
+    raise RuntimeError("worker crashed")
+
+
+@pytest.mark.asyncio
+async def test_restart_delay_backs_off_and_resets(monkeypatch):
+    clock = [1000.0]
+    delays = []
+
+    async def scheduled_run(name, factory, delay=0):
+        delays.append(delay)
+
+    monkeypatch.setitem(workers.WORKER_FACTORIES, "flaky", _crash)
+    monkeypatch.setattr(workers.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(workers, "_run_worker", scheduled_run)
+    monkeypatch.setattr(workers, "restart_attempts", {})
+    monkeypatch.setattr(workers, "worker_started_at", {"flaky": clock[0]})
+    monkeypatch.setattr(workers, "worker_tasks", {})
+
+    async def restart():
+        await workers.restart_worker("flaky")
+        await workers.worker_tasks["flaky"]
+
+    for _ in range(8):
+        await restart()
+    assert delays == [1, 2, 4, 8, 16, 32, 60, 60]
+
+    # A run that stayed up starts over at the shortest delay
+    clock[0] += workers.HEALTHY_RUN_SECONDS
+    await restart()
+    assert delays[-1] == 1